@@ -1,18 +1,26 @@
 """
 Full Evaluation Script:
-- Generates outputs from GPT-4o, Claude Sonnet, Gemini Flash, DeepSeek
+- Generates outputs from GPT-4o, Claude Sonnet, Gemini Flash, DeepSeek concurrently
+  through a shared pooled HTTP client layer (providers.py)
 - Evaluates them using Claude Sonnet as a judge
 - Saves outputs and structured JSON report
 """
 
 import os
 import json
-import requests
-from openai import OpenAI
-from anthropic import Anthropic
-import google.generativeai as genai
+import time
+import asyncio
+import argparse
+import hashlib
+import threading
+from pathlib import Path
 from dotenv import load_dotenv
 
+from providers import (
+    HTTPTransport, MockTransport,
+    OpenAIProvider, AnthropicProvider, GeminiProvider, DeepSeekProvider,
+)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -29,6 +37,68 @@ DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 # File with evaluation prompt
 EVAL_PROMPT_FILE = "evaluation_prompt.txt"
 
+# Model and generation parameters per provider. These are part of the
+# response cache key, so changing them invalidates cached outputs.
+PROVIDER_PARAMS = {
+    "GPT-4o": {"model": "gpt-4o", "max_output_tokens": 1500},
+    "Claude Sonnet": {"model": "claude-3-5-sonnet-latest", "max_tokens": 1500},
+    "Gemini Flash": {"model": "gemini-1.5-flash"},
+    "DeepSeek": {"model": "deepseek-chat", "temperature": 0.2},
+}
+JUDGE_PARAMS = {"model": "claude-3-5-sonnet-latest", "max_tokens": 800}
+# Output token limit of the judge model. A batched judge request asks for
+# max_tokens per output, so this also bounds --judge-batch-size.
+JUDGE_MAX_OUTPUT_TOKENS = 8192
+
+# Content-addressed cache of provider and judge responses
+RESPONSE_CACHE_DIR = "cache/responses"
+
+# Per-provider call limits:
+# - timeout: seconds one attempt may take end to end (and may stall on a read)
+# - retries: extra attempts after a transient failure before the first token
+# - requests_per_minute: client-side rate limit, applied to every attempt
+PROVIDER_LIMITS = {
+    "GPT-4o": {"timeout": 120, "retries": 3, "requests_per_minute": 60},
+    "Claude Sonnet": {"timeout": 120, "retries": 3, "requests_per_minute": 50},
+    "Gemini Flash": {"timeout": 90, "retries": 3, "requests_per_minute": 15},
+    "DeepSeek": {"timeout": 180, "retries": 3, "requests_per_minute": 60},
+}
+
+# Base delay for exponential backoff between retries (seconds)
+RETRY_BACKOFF_SECONDS = 2
+
+# HTTP connection settings shared by every provider
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_POOL_SIZE = 16
+
+# Matrix mode: one JSONL line per finished (prompt, model, sample), so an
+# interrupted run resumes where it stopped
+CHECKPOINT_FILE = "results/checkpoint.jsonl"
+MATRIX_REPORT_FILE = "results/matrix_report.json"
+MATRIX_CONCURRENCY = 8
+
+# --mock runs write their checkpoint, outputs and reports here, so a
+# harness benchmark never leaves mock results where a real run resumes
+MOCK_RESULTS_DIR = "results/mock"
+
+SCORE_KEYS = ["appdev", "sql", "devops", "security", "clarity"]
+
+# Judge requests in flight at once, outputs scored per judge request
+# (1 = one request per output), and how long a partial batch waits for
+# more outputs before it is sent
+JUDGE_CONCURRENCY = 4
+JUDGE_BATCH_SIZE = 1
+JUDGE_BATCH_WAIT_SECONDS = 0.5
+
+# USD per million (input, output) tokens, used for cost estimates.
+# Update when provider pricing changes.
+PRICING = {
+    "GPT-4o": (2.50, 10.00),
+    "Claude Sonnet": (3.00, 15.00),
+    "Gemini Flash": (0.075, 0.30),
+    "DeepSeek": (0.27, 1.10),
+}
+
 # ======================
 # LOAD PROMPT
 # ======================
@@ -37,81 +107,289 @@ with open(EVAL_PROMPT_FILE, "r") as f:
     PROMPT = f.read()
 
 # ======================
-# INITIALIZE CLIENTS
+# PROVIDER CLIENTS
 # ======================
 
-# GPT-4o
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Model name -> (provider class, API key)
+PROVIDERS = {
+    "GPT-4o": (OpenAIProvider, OPENAI_API_KEY),
+    "Claude Sonnet": (AnthropicProvider, ANTHROPIC_API_KEY),
+    "Gemini Flash": (GeminiProvider, GOOGLE_API_KEY),
+    "DeepSeek": (DeepSeekProvider, DEEPSEEK_API_KEY),
+}
+
+# One pooled keep-alive session for every provider; --mock swaps in
+# MockTransport to run the whole harness offline
+transport = HTTPTransport(pool_size=HTTP_POOL_SIZE)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Provider client for a model name, or "judge". Built on first use."""
+    with _clients_lock:
+        if name not in _clients:
+            if name == "judge":
+                provider_class, api_key = PROVIDERS["Claude Sonnet"]
+                params, limits = JUDGE_PARAMS, PROVIDER_LIMITS["Claude Sonnet"]
+            else:
+                provider_class, api_key = PROVIDERS[name]
+                params, limits = PROVIDER_PARAMS[name], PROVIDER_LIMITS[name]
+
+            _clients[name] = provider_class(
+                transport,
+                api_key,
+                params,
+                timeout=(HTTP_CONNECT_TIMEOUT, limits["timeout"]),
+                retries=limits["retries"],
+                backoff=RETRY_BACKOFF_SECONDS,
+                deadline=limits["timeout"],
+            )
+        return _clients[name]
+
+
+def use_mock_transport(**options):
+    global transport
+    with _clients_lock:
+        transport = MockTransport(**options)
+        _clients.clear()
+
+# ======================
+# CALL METRICS
+# ======================
+
+class CallMetrics:
+    """Timing and token usage for one streamed provider call."""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.input_tokens = 0
+        self.output_tokens = 0
 
-# Claude
-anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    def token(self):
+        """Call on every streamed text delta."""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
 
-# Gemini
-genai.configure(api_key=GOOGLE_API_KEY)
+    def finish(self):
+        end = time.perf_counter()
+        latency = end - self.start
+        ttft = (self.first_token_at or end) - self.start
+        generation_time = latency - ttft
+
+        price_in, price_out = PRICING.get(self.model_name, (0.0, 0.0))
+        cost = (self.input_tokens * price_in + self.output_tokens * price_out) / 1_000_000
+
+        return {
+            "ttft_s": round(ttft, 3),
+            "latency_s": round(latency, 3),
+            "output_tokens_per_s": round(self.output_tokens / generation_time, 1) if generation_time > 0 else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(cost, 6),
+        }
 
 # ======================
-# MODEL CALL FUNCTIONS
+# RESPONSE CACHE
 # ======================
 
-def run_gpt4o(prompt):
-    resp = openai_client.responses.create(
-        model="gpt-4o",
-        input=prompt,
-        max_output_tokens=1500
-    )
-    return resp.output_text
+class CacheMiss(Exception):
+    """Raised in replay mode when a provider response is not cached."""
 
-def run_claude(prompt):
-    msg = anthropic_client.messages.create(
-        model="claude-3-5-sonnet-latest",
-        max_tokens=1500,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return msg.content[0].text
-
-def run_gemini(prompt):
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    resp = model.generate_content(prompt)
-    return resp.text
-
-def run_deepseek(prompt):
-    url = "https://api.deepseek.com/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "deepseek-chat",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2
-    }
-    res = requests.post(url, headers=headers, json=payload)
-    return res.json()["choices"][0]["message"]["content"]
+
+class ResponseCache:
+    """
+    Stores provider and judge responses on disk under a hash of
+    (provider, parameters, prompt hash, sample). In replay mode provider
+    misses raise CacheMiss instead of calling the network.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.replay = False
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, provider, params, prompt, sample=0):
+        identity = {
+            "provider": provider,
+            "params": params,
+            "prompt_sha256": hashlib.sha256(prompt.encode()).hexdigest(),
+            "sample": sample,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_DIR)
 
 # ======================
-# GENERATE OUTPUTS
+# ASYNC RUNNER
 # ======================
 
-outputs = {}
+class RateLimiter:
+    """Spaces out request starts to stay under a requests-per-minute limit."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        await asyncio.sleep(slot - now)
+
+
+def run_measured(model_name, prompt, before_retry=None):
+    metrics = CallMetrics(model_name)
+    completion = get_client(model_name).generate(prompt, on_token=metrics.token, before_retry=before_retry)
+    metrics.input_tokens = completion.input_tokens
+    metrics.output_tokens = completion.output_tokens
+    return completion.text, metrics.finish()
+
+
+async def call_provider(model_name, prompt, limiter, sample=0):
+    """
+    Runs one blocking provider call in a worker thread; the provider client
+    applies its timeouts and retries. Returns the output text and the call's
+    CallMetrics summary; cached responses return the metrics recorded when
+    they were generated.
+    """
+    key = response_cache.key(model_name, PROVIDER_PARAMS[model_name], prompt, sample)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached["text"], cached["metrics"]
+    if response_cache.replay:
+        raise CacheMiss(f"no cached response for {model_name} (sample {sample})")
+
+    # Every attempt takes a limiter slot, retries from the worker thread too
+    loop = asyncio.get_running_loop()
+    def before_retry():
+        asyncio.run_coroutine_threadsafe(limiter.wait(), loop).result()
+
+    await limiter.wait()
+    text, metrics = await asyncio.to_thread(run_measured, model_name, prompt, before_retry)
+    response_cache.put(key, {"provider": model_name, "text": text, "metrics": metrics})
+    return text, metrics
+
+
+def make_limiters():
+    return {
+        name: RateLimiter(limits["requests_per_minute"])
+        for name, limits in PROVIDER_LIMITS.items()
+    }
 
-print("Generating outputs from all models...")
 
-outputs["GPT-4o"] = run_gpt4o(PROMPT)
-outputs["Claude Sonnet"] = run_claude(PROMPT)
-outputs["Gemini Flash"] = run_gemini(PROMPT)
-outputs["DeepSeek"] = run_deepseek(PROMPT)
+async def generate_outputs(prompt, models):
+    """
+    Calls every provider concurrently. Returns (outputs, metrics) keyed by
+    model name; providers that fail are left out of both.
+    """
+    limiters = make_limiters()
+
+    async def timed(model_name):
+        text, metrics = await call_provider(model_name, prompt, limiters[model_name])
+        print(f"{model_name} finished in {metrics['latency_s']:.1f}s "
+              f"(TTFT {metrics['ttft_s']:.2f}s, {metrics['output_tokens_per_s']} tok/s)")
+        return text, metrics
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(timed(name) for name in models),
+        return_exceptions=True
+    )
+    print(f"All providers finished in {time.perf_counter() - start:.1f}s")
 
-# Save raw outputs
-for model, text in outputs.items():
-    filename = f"output_{model.replace(' ', '_')}.txt"
-    with open(filename, "w") as f:
-        f.write(text)
-    print(f"Saved {filename}")
+    outputs, metrics = {}, {}
+    for model_name, result in zip(models, results):
+        if isinstance(result, Exception):
+            print(f"{model_name} failed: {type(result).__name__}: {result}")
+        else:
+            outputs[model_name], metrics[model_name] = result
+    return outputs, metrics
 
 # ======================
 # JUDGE FUNCTION (Claude)
 # ======================
 
+judge_calls = 0
+
+
+def call_judge(eval_prompt, max_tokens):
+    """
+    Sends one judge request, through the response cache. Editing the judge
+    prompt changes the key, so only the judge is re-run when iterating on it.
+    """
+    global judge_calls
+
+    params = {**JUDGE_PARAMS, "max_tokens": max_tokens}
+    key = response_cache.key("judge", params, eval_prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached["text"]
+
+    judge_calls += 1
+    judge_text = get_client("judge").generate(eval_prompt, max_tokens=max_tokens).text
+    response_cache.put(key, {"provider": "judge", "text": judge_text})
+    return judge_text
+
+
+def invalid_evaluation(model_name):
+    """Fallback if the judge returns invalid JSON."""
+    return {
+        "model": model_name,
+        "scores": {
+            "appdev": 0,
+            "sql": 0,
+            "devops": 0,
+            "security": 0,
+            "clarity": 0
+        },
+        "strengths": [],
+        "weaknesses": ["Invalid JSON returned by judge model"],
+        "final_verdict": "Review Needed"
+    }
+
+
+def is_valid_evaluation(evaluation):
+    scores = evaluation.get("scores") if isinstance(evaluation, dict) else None
+    return isinstance(scores, dict) and all(
+        isinstance(scores.get(key), (int, float)) and 1 <= scores[key] <= 5
+        for key in SCORE_KEYS
+    )
+
+
 def evaluate_output(model_name, model_output):
     """
     Uses Claude Sonnet to evaluate model output.
@@ -149,45 +427,431 @@ Return STRICT JSON format:
 }}
 """
 
-    response = anthropic_client.messages.create(
-        model="claude-3-5-sonnet-latest",
-        max_tokens=800,
-        messages=[{"role": "user", "content": eval_prompt}]
-    )
+    judge_text = call_judge(eval_prompt, JUDGE_PARAMS["max_tokens"])
 
     try:
         # Attempt to parse JSON from model
-        return json.loads(response.content[0].text)
+        return json.loads(judge_text)
     except json.JSONDecodeError:
-        # Fallback if model returns invalid JSON
-        return {
-            "model": model_name,
-            "scores": {
-                "appdev": 0,
-                "sql": 0,
-                "devops": 0,
-                "security": 0,
-                "clarity": 0
-            },
-            "strengths": [],
-            "weaknesses": ["Invalid JSON returned by judge model"],
-            "final_verdict": "Review Needed"
-        }
+        return invalid_evaluation(model_name)
+
+
+def evaluate_batch(items):
+    """
+    Scores several (model_name, output) pairs in one judge request. Entries
+    missing from the reply or failing validation are re-judged one by one.
+    """
+    sections = "\n\n".join(
+        f"=== OUTPUT {i} (MODEL NAME: {model_name}) ===\n{model_output}"
+        for i, (model_name, model_output) in enumerate(items, 1)
+    )
+    eval_prompt = f"""
+You are a neutral senior engineer evaluating AI model outputs.
+Evaluate each of the {len(items)} outputs below independently.
+
+{sections}
+
+For each output, score each aspect from 1–5:
+- AppDev Code Quality
+- SQL Correctness
+- DevOps Practicality
+- Security & Best Practices
+- Clarity & Explanations
+
+List major strengths and weaknesses.
+Return STRICT JSON format, with one entry per output in order:
+{{
+  "evaluations": [
+    {{
+      "output": 1,
+      "model": "",
+      "scores": {{
+        "appdev": 0,
+        "sql": 0,
+        "devops": 0,
+        "security": 0,
+        "clarity": 0
+      }},
+      "strengths": [],
+      "weaknesses": [],
+      "final_verdict": ""
+    }}
+  ]
+}}
+"""
+
+    max_tokens = min(JUDGE_PARAMS["max_tokens"] * len(items), JUDGE_MAX_OUTPUT_TOKENS)
+    judge_text = call_judge(eval_prompt, max_tokens)
+
+    by_index = {}
+    try:
+        for evaluation in json.loads(judge_text).get("evaluations", []):
+            if isinstance(evaluation, dict) and is_valid_evaluation(evaluation):
+                by_index[int(evaluation.pop("output", 0))] = evaluation
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        pass
+
+    results = []
+    for i, (model_name, model_output) in enumerate(items, 1):
+        if i in by_index:
+            results.append({**by_index[i], "model": model_name})
+        else:
+            results.append(evaluate_output(model_name, model_output))
+    return results
+
+
+class JudgeBatcher:
+    """
+    Collects judge requests from concurrent tasks and runs them with at most
+    `concurrency` requests in flight. With batch_size > 1, up to batch_size
+    outputs are scored per request; a partial batch is sent after max_wait
+    seconds.
+    """
+
+    def __init__(self, batch_size=1, concurrency=4, max_wait=JUDGE_BATCH_WAIT_SECONDS):
+        self.batch_size = max(1, batch_size)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_wait = max_wait
+        self.pending = []
+        self.timer = None
+        self.tasks = set()
+
+    async def evaluate(self, model_name, model_output):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((model_name, model_output, future))
+
+        if len(self.pending) >= self.batch_size:
+            self._flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, batch):
+        items = [(model_name, model_output) for model_name, model_output, _ in batch]
+        async with self.semaphore:
+            try:
+                if len(items) == 1:
+                    results = [await asyncio.to_thread(evaluate_output, *items[0])]
+                else:
+                    results = await asyncio.to_thread(evaluate_batch, items)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                return
+
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+async def evaluate_outputs(outputs, batch_size, concurrency):
+    """
+    Judges {model_name: output} concurrently. Models whose judge call fails
+    are logged and left out.
+    """
+    batcher = JudgeBatcher(batch_size, concurrency)
+    names = list(outputs)
+    results = await asyncio.gather(
+        *(batcher.evaluate(name, outputs[name]) for name in names),
+        return_exceptions=True
+    )
+
+    evaluations = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Judging {name} failed: {type(result).__name__}: {result}")
+        else:
+            evaluations[name] = result
+    return evaluations
 
 # ======================
-# RUN EVALUATION
+# MATRIX MODE
 # ======================
 
-report = {}
+def load_prompts(prompts_dir):
+    """Every .txt file in the directory is a prompt, named by its file stem."""
+    return {path.stem: path.read_text() for path in sorted(Path(prompts_dir).glob("*.txt"))}
+
+
+def load_checkpoint(path):
+    """
+    Reads all finished results. A line cut short by an interrupted write is
+    truncated away so later appends start on a clean line.
+    """
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if data and not data.endswith(b"\n"):
+        data = data[:data.rfind(b"\n") + 1]
+        with open(path, "wb") as f:
+            f.write(data)
+
+    return [json.loads(line) for line in data.decode().splitlines() if line.strip()]
+
+
+def params_sha256(model_name):
+    """Hash of everything besides the prompt that shapes a cell's result."""
+    params = {"provider": PROVIDER_PARAMS[model_name], "judge": JUDGE_PARAMS}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def cell_key(record):
+    return (record["prompt"], record["model"], record["sample"],
+            record.get("prompt_sha256"), record.get("params_sha256"))
+
+
+def latest_records(records):
+    """
+    One record per (prompt, model, sample): the most recent, so results
+    re-run after a prompt or parameter change replace the stale ones.
+    """
+    latest = {}
+    for record in records:
+        latest[(record["prompt"], record["model"], record["sample"])] = record
+    return list(latest.values())
+
 
-print("Evaluating outputs with Claude Sonnet as judge...")
+def append_checkpoint(path, record):
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
 
-for model, text in outputs.items():
-    report[model] = evaluate_output(model, text)
-    print(f"Evaluated {model}")
 
-# Save final report
-with open("final_evaluation_report.json", "w") as f:
-    json.dump(report, f, indent=2)
+async def run_matrix(prompts, models, samples, checkpoint, concurrency, judge_batch_size, judge_concurrency):
+    """
+    Runs every missing (prompt, model, sample) cell and checkpoints it.
+    Cells are keyed by prompt and parameter hashes too, so editing a prompt
+    file or PROVIDER_PARAMS re-runs the affected cells.
+    """
+    os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+    done = {cell_key(r) for r in load_checkpoint(checkpoint)}
+    prompt_hashes = {name: hashlib.sha256(text.encode()).hexdigest() for name, text in prompts.items()}
+    param_hashes = {model_name: params_sha256(model_name) for model_name in models}
+    todo = [
+        (prompt_name, model_name, sample)
+        for prompt_name in prompts
+        for sample in range(samples)
+        for model_name in models
+        if (prompt_name, model_name, sample, prompt_hashes[prompt_name], param_hashes[model_name]) not in done
+    ]
+    total = len(prompts) * len(models) * samples
+    print(f"{total - len(todo)} results already in {checkpoint}, {len(todo)} to run")
+
+    limiters = make_limiters()
+    semaphore = asyncio.Semaphore(concurrency)
+    batcher = JudgeBatcher(judge_batch_size, judge_concurrency)
+
+    async def run_cell(prompt_name, model_name, sample):
+        async with semaphore:
+            try:
+                output, metrics = await call_provider(
+                    model_name, prompts[prompt_name], limiters[model_name], sample
+                )
+            except Exception as e:
+                print(f"{prompt_name} / {model_name} #{sample} failed: {type(e).__name__}: {e}")
+                return
+
+        # Judged outside the generation slot so batching does not hold it.
+        # The output is in the response cache, so a rerun only re-judges.
+        try:
+            evaluation = await batcher.evaluate(model_name, output)
+        except Exception as e:
+            print(f"{prompt_name} / {model_name} #{sample} judge failed: {type(e).__name__}: {e}")
+            return
+
+        append_checkpoint(checkpoint, {
+            "prompt": prompt_name,
+            "model": model_name,
+            "sample": sample,
+            "prompt_sha256": prompt_hashes[prompt_name],
+            "params_sha256": param_hashes[model_name],
+            "output": output,
+            "metrics": metrics,
+            "evaluation": evaluation,
+            "timestamp": time.time(),
+        })
+        print(f"Finished {prompt_name} / {model_name} #{sample}")
+
+    await asyncio.gather(*(run_cell(*cell) for cell in todo))
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile, q in [0, 100]."""
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def performance_stats(metrics):
+    """p50/p90/p99 latency figures and mean usage over repeated calls."""
+    if not metrics:
+        return {}
+
+    stats = {}
+    for key in ("ttft_s", "latency_s", "output_tokens_per_s"):
+        values = [m[key] for m in metrics if m.get(key) is not None]
+        if values:
+            stats[key] = {f"p{q}": round(percentile(values, q), 3) for q in (50, 90, 99)}
+    for key in ("input_tokens", "output_tokens", "cost_usd"):
+        stats[f"mean_{key}"] = round(sum(m[key] for m in metrics) / len(metrics), 6)
+    stats["total_cost_usd"] = round(sum(m["cost_usd"] for m in metrics), 6)
+    return stats
+
+
+def summarize(records):
+    scores = {
+        key: round(sum(r["evaluation"]["scores"].get(key, 0) for r in records) / len(records), 2)
+        for key in SCORE_KEYS
+    }
+    return {
+        "samples": len(records),
+        "scores": scores,
+        "overall": round(sum(scores.values()) / len(scores), 2),
+        "performance": performance_stats([r["metrics"] for r in records if "metrics" in r]),
+    }
+
+
+def build_matrix_report(records):
+    """Averages judge scores per model and per (prompt, model)."""
+    by_model, by_prompt = {}, {}
+    for r in records:
+        by_model.setdefault(r["model"], []).append(r)
+        by_prompt.setdefault(r["prompt"], {}).setdefault(r["model"], []).append(r)
+
+    return {
+        "models": {model: summarize(rs) for model, rs in by_model.items()},
+        "prompts": {
+            prompt: {model: summarize(rs) for model, rs in models.items()}
+            for prompt, models in by_prompt.items()
+        },
+    }
+
+# ======================
+# RUN EVALUATION
+# ======================
 
-print("Final evaluation report saved as final_evaluation_report.json")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate and judge model outputs")
+    parser.add_argument("--models", default=",".join(PROVIDERS),
+                        help="Comma-separated subset of: " + ", ".join(PROVIDERS))
+    parser.add_argument("--prompts-dir",
+                        help="Matrix mode: evaluate every .txt prompt in this directory")
+    parser.add_argument("--samples", type=int, default=1,
+                        help="Matrix mode: samples per (prompt, model)")
+    parser.add_argument("--checkpoint",
+                        help=f"Matrix mode checkpoint (default: {CHECKPOINT_FILE}, or under {MOCK_RESULTS_DIR} with --mock)")
+    parser.add_argument("--concurrency", type=int, default=MATRIX_CONCURRENCY)
+    parser.add_argument("--judge-concurrency", type=int, default=JUDGE_CONCURRENCY)
+    parser.add_argument("--judge-batch-size", type=int, default=JUDGE_BATCH_SIZE,
+                        help="Outputs scored per judge request (1 = one request per output)")
+    parser.add_argument("--replay", action="store_true",
+                        help="Serve provider outputs from the response cache only, never the network; "
+                             "the judge is called only for prompts not already cached")
+    parser.add_argument("--mock", action="store_true",
+                        help="Use the offline mock transport (no network, no response cache) to benchmark the harness")
+    parser.add_argument("--report-only", action="store_true",
+                        help="Matrix mode: rebuild the report from the checkpoint without calling any model")
+    args = parser.parse_args()
+
+    args.models = [m.strip() for m in args.models.split(",") if m.strip()]
+    unknown = [m for m in args.models if m not in PROVIDERS]
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    max_batch_size = JUDGE_MAX_OUTPUT_TOKENS // JUDGE_PARAMS["max_tokens"]
+    if not 1 <= args.judge_batch_size <= max_batch_size:
+        parser.error(f"--judge-batch-size must be between 1 and {max_batch_size} "
+                     f"({JUDGE_PARAMS['max_tokens']} judge tokens per output, {JUDGE_MAX_OUTPUT_TOKENS} max)")
+
+    if args.mock:
+        if args.checkpoint and os.path.abspath(args.checkpoint) == os.path.abspath(CHECKPOINT_FILE):
+            parser.error(f"--mock must not write to the real checkpoint {CHECKPOINT_FILE}")
+        args.output_dir = MOCK_RESULTS_DIR
+        args.checkpoint = args.checkpoint or os.path.join(MOCK_RESULTS_DIR, os.path.basename(CHECKPOINT_FILE))
+        args.report_file = os.path.join(MOCK_RESULTS_DIR, os.path.basename(MATRIX_REPORT_FILE))
+    else:
+        args.output_dir = ""
+        args.checkpoint = args.checkpoint or CHECKPOINT_FILE
+        args.report_file = MATRIX_REPORT_FILE
+    return args
+
+
+def main_matrix(args):
+    if not args.report_only:
+        prompts = load_prompts(args.prompts_dir)
+        print(f"Matrix: {len(prompts)} prompts x {len(args.models)} models x {args.samples} samples")
+        start = time.perf_counter()
+        asyncio.run(run_matrix(
+            prompts, args.models, args.samples, args.checkpoint, args.concurrency,
+            args.judge_batch_size, args.judge_concurrency
+        ))
+        print(f"Matrix finished in {time.perf_counter() - start:.1f}s, {judge_calls} judge API calls")
+
+    report = build_matrix_report(latest_records(load_checkpoint(args.checkpoint)))
+    os.makedirs(os.path.dirname(args.report_file), exist_ok=True)
+    with open(args.report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Matrix report saved as {args.report_file}")
+    print(f"Response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+
+
+def main():
+    args = parse_args()
+    response_cache.replay = args.replay
+    if args.mock:
+        use_mock_transport()
+        response_cache.enabled = False
+    if args.prompts_dir or args.report_only:
+        main_matrix(args)
+        return
+
+    print("Generating outputs from all models...")
+    outputs, metrics = asyncio.run(generate_outputs(PROMPT, args.models))
+
+    # Save raw outputs
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for model, text in outputs.items():
+        filename = os.path.join(args.output_dir, f"output_{model.replace(' ', '_')}.txt")
+        with open(filename, "w") as f:
+            f.write(text)
+        print(f"Saved {filename}")
+
+    print("Evaluating outputs with Claude Sonnet as judge...")
+
+    start = time.perf_counter()
+    report = asyncio.run(evaluate_outputs(outputs, args.judge_batch_size, args.judge_concurrency))
+    print(f"Evaluated {len(report)} outputs in {time.perf_counter() - start:.1f}s "
+          f"with {judge_calls} judge API calls")
+
+    for model in report:
+        report[model]["performance"] = metrics[model]
+
+    # Save final report
+    report_file = os.path.join(args.output_dir, "final_evaluation_report.json")
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Final evaluation report saved as {report_file}")
+    print(f"Response cache: {response_cache.hits} hits, {response_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Provider client layer for the model comparison harness.
+
+Every provider speaks its streaming HTTP API through a shared transport:
+- HTTPTransport: one connection-pooled keep-alive session for all providers
+- MockTransport: local canned streams, so the harness can run offline
+
+Providers retry transient failures (connection errors, 429, 5xx) with
+jittered exponential backoff, but only before the first token arrives.
+Each attempt also has an overall deadline, so a stream that keeps
+trickling in slowly cannot run forever.
+"""
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP statuses worth retrying: timeouts, rate limits, overload, server errors
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderError(Exception):
+    """A failed provider request. `retryable` marks transient failures."""
+
+    def __init__(self, message, status=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class Completion:
+    text: str = ""
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+# ======================
+# TRANSPORTS
+# ======================
+
+def parse_retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HTTPTransport:
+    """Pooled keep-alive HTTP session that streams server-sent events."""
+
+    def __init__(self, pool_size=16):
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # Built on first use; requests.Session keeps connections alive and
+        # the adapter holds up to pool_size of them per host
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def stream(self, provider, url, headers, payload, timeout):
+        """Yields the JSON payload of every `data:` line in the response."""
+        try:
+            res = self.session.post(url, headers=headers, json=payload, stream=True, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ProviderError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+        with res:
+            if res.status_code >= 400:
+                raise ProviderError(
+                    f"HTTP {res.status_code}: {res.text[:500]}",
+                    status=res.status_code,
+                    retryable=res.status_code in RETRY_STATUSES,
+                    retry_after=parse_retry_after(res.headers.get("retry-after")),
+                )
+            try:
+                for line in res.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data and data != "[DONE]":
+                        yield json.loads(data)
+            except requests.RequestException as e:
+                raise ProviderError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class MockTransport:
+    """
+    Offline stand-in for HTTPTransport. Streams a canned reply in the calling
+    provider's own event format with a configurable time to first token and
+    token rate, and fails a fraction of requests with a retryable 503.
+    """
+
+    def __init__(self, ttft=0.3, tokens_per_second=80.0, output_tokens=400, failure_rate=0.0, seed=None):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+
+    def stream(self, provider, url, headers, payload, timeout):
+        if self.random.random() < self.failure_rate:
+            raise ProviderError("HTTP 503: mock failure", status=503, retryable=True)
+
+        input_tokens = len(json.dumps(payload)) // 4
+        deltas = [f"token{i} " for i in range(self.output_tokens)]
+
+        time.sleep(self.ttft)
+        for event in provider.mock_events(deltas, input_tokens):
+            yield event
+            if event.get("_delta"):
+                time.sleep(1.0 / self.tokens_per_second)
+
+    def close(self):
+        pass
+
+
+# ======================
+# PROVIDERS
+# ======================
+
+class Provider:
+    """
+    Base streaming provider. Subclasses build the request and turn each
+    streamed event into a text delta and/or token usage.
+    """
+
+    def __init__(self, transport, api_key, params, timeout=(10, 120), retries=3, backoff=2.0, deadline=None):
+        self.transport = transport
+        self.api_key = api_key
+        self.params = params
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+
+    def build_request(self, prompt, params):
+        """Returns (url, headers, payload)."""
+        raise NotImplementedError
+
+    def handle_event(self, event, completion):
+        """Updates usage on `completion` and returns the event's text delta, if any."""
+        raise NotImplementedError
+
+    def mock_events(self, deltas, input_tokens):
+        """Events a real stream of `deltas` would produce, for MockTransport."""
+        raise NotImplementedError
+
+    def generate(self, prompt, on_token=None, before_retry=None, **overrides):
+        """
+        Streams one completion. `on_token` is called for every text delta and
+        `before_retry` before every retried attempt (e.g. to take a rate
+        limiter slot); keyword arguments override the request parameters.
+        """
+        url, headers, payload = self.build_request(prompt, {**self.params, **overrides})
+
+        for attempt in range(self.retries + 1):
+            completion = Completion()
+            parts = []
+            started = time.monotonic()
+            stream = self.transport.stream(self, url, headers, payload, self.timeout)
+            try:
+                for event in stream:
+                    delta = self.handle_event(event, completion)
+                    if delta:
+                        if on_token:
+                            on_token()
+                        parts.append(delta)
+                    if self.deadline and time.monotonic() - started > self.deadline:
+                        raise ProviderError(f"attempt exceeded its {self.deadline}s deadline", retryable=True)
+                completion.text = "".join(parts)
+                return completion
+            except ProviderError as e:
+                # Once text has streamed, a retry would double-count it
+                if parts or not e.retryable or attempt == self.retries:
+                    raise
+                delay = e.retry_after or self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            finally:
+                # Releases the connection of an abandoned stream
+                stream.close()
+
+            time.sleep(delay)
+            if before_retry:
+                before_retry()
+
+
+class OpenAIProvider(Provider):
+    """OpenAI Responses API."""
+
+    url = "https://api.openai.com/v1/responses"
+
+    def build_request(self, prompt, params):
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        return self.url, headers, {**params, "input": prompt, "stream": True}
+
+    def handle_event(self, event, completion):
+        kind = event.get("type")
+        if kind == "response.output_text.delta":
+            return event["delta"]
+        if kind == "response.completed":
+            usage = event["response"]["usage"]
+            completion.input_tokens = usage["input_tokens"]
+            completion.output_tokens = usage["output_tokens"]
+        elif kind in ("error", "response.failed"):
+            raise ProviderError(json.dumps(event)[:500])
+        return None
+
+    def mock_events(self, deltas, input_tokens):
+        for delta in deltas:
+            yield {"type": "response.output_text.delta", "delta": delta, "_delta": True}
+        yield {"type": "response.completed", "response": {"usage": {
+            "input_tokens": input_tokens, "output_tokens": len(deltas)}}}
+
+
+class AnthropicProvider(Provider):
+    """Anthropic Messages API."""
+
+    url = "https://api.anthropic.com/v1/messages"
+
+    def build_request(self, prompt, params):
+        headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+        payload = {**params, "messages": [{"role": "user", "content": prompt}], "stream": True}
+        return self.url, headers, payload
+
+    def handle_event(self, event, completion):
+        kind = event.get("type")
+        if kind == "message_start":
+            completion.input_tokens = event["message"]["usage"]["input_tokens"]
+        elif kind == "content_block_delta" and event["delta"].get("type") == "text_delta":
+            return event["delta"]["text"]
+        elif kind == "message_delta":
+            completion.output_tokens = event["usage"]["output_tokens"]
+        elif kind == "error":
+            error = event.get("error", {})
+            raise ProviderError(
+                f"{error.get('type')}: {error.get('message')}",
+                retryable=error.get("type") == "overloaded_error",
+            )
+        return None
+
+    def mock_events(self, deltas, input_tokens):
+        yield {"type": "message_start", "message": {"usage": {"input_tokens": input_tokens}}}
+        for delta in deltas:
+            yield {"type": "content_block_delta", "delta": {"type": "text_delta", "text": delta}, "_delta": True}
+        yield {"type": "message_delta", "usage": {"output_tokens": len(deltas)}}
+
+
+class GeminiProvider(Provider):
+    """Google Gemini streamGenerateContent API."""
+
+    def build_request(self, prompt, params):
+        params = dict(params)
+        model = params.pop("model")
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse"
+        payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if params:
+            payload["generationConfig"] = params
+        return url, {"x-goog-api-key": self.api_key}, payload
+
+    def handle_event(self, event, completion):
+        usage = event.get("usageMetadata")
+        if usage:
+            completion.input_tokens = usage.get("promptTokenCount", 0)
+            completion.output_tokens = usage.get("candidatesTokenCount", 0)
+
+        parts = []
+        for candidate in event.get("candidates", [])[:1]:
+            for part in candidate.get("content", {}).get("parts", []):
+                parts.append(part.get("text", ""))
+        return "".join(parts)
+
+    def mock_events(self, deltas, input_tokens):
+        for i, delta in enumerate(deltas, 1):
+            yield {
+                "candidates": [{"content": {"parts": [{"text": delta}]}}],
+                "usageMetadata": {"promptTokenCount": input_tokens, "candidatesTokenCount": i},
+                "_delta": True,
+            }
+
+
+class DeepSeekProvider(Provider):
+    """DeepSeek's OpenAI-compatible chat completions API."""
+
+    url = "https://api.deepseek.com/v1/chat/completions"
+
+    def build_request(self, prompt, params):
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        payload = {
+            **params,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        return self.url, headers, payload
+
+    def handle_event(self, event, completion):
+        if event.get("usage"):
+            completion.input_tokens = event["usage"]["prompt_tokens"]
+            completion.output_tokens = event["usage"]["completion_tokens"]
+        return "".join(
+            choice.get("delta", {}).get("content") or ""
+            for choice in event.get("choices", [])
+        )
+
+    def mock_events(self, deltas, input_tokens):
+        for delta in deltas:
+            yield {"choices": [{"delta": {"content": delta}}], "_delta": True}
+        yield {"choices": [], "usage": {"prompt_tokens": input_tokens, "completion_tokens": len(deltas)}}
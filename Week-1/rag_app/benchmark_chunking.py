@@ -0,0 +1,62 @@
+import random
+import sys
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from chunking import SEPARATORS, get_tokenizer, iter_chunk_spans
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+from ingest import load_pages
+
+# Throughput of the span chunker against RecursiveCharacterTextSplitter
+# configured with the same token budget. Pass PDF paths to benchmark real
+# documents; otherwise synthetic pages are generated.
+
+WORDS = ["policy", "employee", "coverage", "the", "of", "claims", "section", "within", "days", "approval"]
+
+def synthetic_pages(num_pages: int = 400, words_per_page: int = 600) -> list[str]:
+    random.seed(0)
+    pages = []
+    for _ in range(num_pages):
+        words = []
+        for i in range(words_per_page):
+            words.append(random.choice(WORDS))
+            if i % 17 == 16:
+                words.append(".\n\n" if i % 85 == 84 else ".")
+        pages.append(" ".join(words))
+    return pages
+
+def measure(name: str, fn, num_chars: int):
+    start = time.perf_counter()
+    chunks = fn()
+    elapsed = time.perf_counter() - start
+
+    longest = max(len(get_tokenizer()(c, add_special_tokens=False, verbose=False)["input_ids"]) for c in chunks)
+    print(f"{name:<32} {elapsed:7.2f}s {num_chars / elapsed / 1e6:7.2f} MB/s "
+          f"{len(chunks):6d} chunks, longest {longest} tokens")
+
+def run(pages: list[str]):
+    text = "\n".join(pages)
+    print(f"{len(pages)} pages, {len(text) / 1e6:.2f} MB, chunk size {CHUNK_SIZE} tokens")
+
+    char_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE * 4,
+        chunk_overlap=CHUNK_OVERLAP * 4,
+        separators=SEPARATORS
+    )
+    token_splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+        get_tokenizer(),
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=SEPARATORS
+    )
+
+    measure("splitter (~4 chars/token)", lambda: char_splitter.split_text(text), len(text))
+    measure("splitter (tokenizer length)", lambda: token_splitter.split_text(text), len(text))
+    measure("iter_chunk_spans", lambda: [text[s:e] for s, e, _ in iter_chunk_spans(pages)], len(text))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run([page for path in sys.argv[1:] for page in load_pages(path)])
+    else:
+        run(synthetic_pages())
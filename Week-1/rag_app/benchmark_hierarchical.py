@@ -0,0 +1,66 @@
+import random
+import sys
+import time
+
+import numpy as np
+from vector_store import VectorStore, documents_collection
+from config import COLLECTION_NAME, TOP_K, HIERARCHICAL_TOP_DOCUMENTS, QDRANT_URL
+
+# Compares flat and two-level search on the live collection. Queries are
+# stored chunk vectors; flat search results are the ground truth for recall.
+# Run it in both local and server mode: locally the stage-two filter is
+# evaluated in Python and two-level search comes out slower.
+
+def sample_query_vectors(store: VectorStore, num_queries: int) -> list[list[float]]:
+    vectors = []
+    for client in store.clients:
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                COLLECTION_NAME, limit=256, offset=offset, with_vectors=True
+            )
+            vectors.extend(point.vector for point in points)
+            if offset is None:
+                break
+    random.seed(0)
+    return random.sample(vectors, min(num_queries, len(vectors)))
+
+def timed(fn) -> tuple[list, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q))
+
+def run(num_queries: int = 100, num_documents: int = HIERARCHICAL_TOP_DOCUMENTS):
+    store = VectorStore()
+    print(f"Mode: {'server ' + QDRANT_URL if QDRANT_URL else 'local'}")
+    print(f"Documents: {store.count(documents_collection(COLLECTION_NAME))}, chunks: {store.count()}")
+
+    queries = sample_query_vectors(store, num_queries)
+    flat_ms, hier_ms, recalls = [], [], []
+
+    for vector in queries:
+        flat, elapsed = timed(lambda: store.search(vector, limit=TOP_K))
+        flat_ms.append(elapsed)
+        hier, elapsed = timed(lambda: store.search_hierarchical(vector, limit=TOP_K, num_documents=num_documents))
+        hier_ms.append(elapsed)
+
+        expected = {point.id for point in flat}
+        recalls.append(len(expected & {point.id for point in hier}) / max(len(expected), 1))
+
+    print(f"Queries: {len(queries)}, top_k: {TOP_K}, top documents: {num_documents}")
+    print(f"Flat:         p50={percentile(flat_ms, 50):.2f}ms p95={percentile(flat_ms, 95):.2f}ms")
+    print(f"Hierarchical: p50={percentile(hier_ms, 50):.2f}ms p95={percentile(hier_ms, 95):.2f}ms")
+    print(f"Recall@{TOP_K} vs flat: {np.mean(recalls):.3f}")
+
+    speedup = percentile(flat_ms, 50) / percentile(hier_ms, 50)
+    print(f"Speedup (p50): {speedup:.2f}x")
+    if speedup < 1:
+        print(f"Hierarchical search is {1 / speedup:.1f}x slower than flat here"
+              + ("" if QDRANT_URL else "; local mode filters in Python, keep HIERARCHICAL_SEARCH off"))
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
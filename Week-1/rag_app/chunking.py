@@ -1,13 +1,115 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Iterator
 
-def get_text_splitter():
-    return RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", " "]
-    )
+from transformers import AutoTokenizer
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_TOKENIZER
+
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    return AutoTokenizer.from_pretrained(CHUNK_TOKENIZER)
+
+class _Page:
+    # One page plus the start offset of every model token in it, so the
+    # token length of any span is two binary searches instead of a re-tokenize.
+    def __init__(self, text: str):
+        self.text = text
+        encoding = get_tokenizer()(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False
+        )
+        self.token_starts = [start for start, _ in encoding["offset_mapping"]]
+
+    def length(self, start: int, end: int) -> int:
+        return bisect_left(self.token_starts, end) - bisect_left(self.token_starts, start)
+
+    def strip(self, start: int, end: int) -> tuple[int, int]:
+        while start < end and self.text[start].isspace():
+            start += 1
+        while end > start and self.text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+def _split_on(page: _Page, start: int, end: int, separator: str) -> list[tuple[int, int]]:
+    # Same pieces as RecursiveCharacterTextSplitter with keep_separator:
+    # each separator stays at the start of the piece that follows it.
+    pieces = []
+    piece_start = start
+    position = page.text.find(separator, start, end)
+    while position != -1:
+        if position > piece_start:
+            pieces.append((piece_start, position))
+        piece_start = position
+        position = page.text.find(separator, position + len(separator), end)
+    if piece_start < end:
+        pieces.append((piece_start, end))
+    return pieces
+
+def _merge(page: _Page, pieces: list[tuple[int, int]]) -> Iterator[tuple[int, int]]:
+    window = []
+    total = 0
+
+    for start, end in pieces:
+        length = page.length(start, end)
+
+        if window and total + length > CHUNK_SIZE:
+            span = page.strip(window[0][0], window[-1][1])
+            if span[0] < span[1]:
+                yield span
+
+            # Slide forward, keeping up to CHUNK_OVERLAP tokens of context
+            while window and (total > CHUNK_OVERLAP or total + length > CHUNK_SIZE):
+                total -= window[0][2]
+                window.pop(0)
+
+        window.append((start, end, length))
+        total += length
+
+    if window:
+        span = page.strip(window[0][0], window[-1][1])
+        if span[0] < span[1]:
+            yield span
+
+def _split(page: _Page, start: int, end: int, separators: list[str]) -> Iterator[tuple[int, int]]:
+    separator, remaining = separators[-1], []
+    for i, candidate in enumerate(separators):
+        if page.text.find(candidate, start, end) != -1:
+            separator, remaining = candidate, separators[i + 1:]
+            break
+
+    small = []
+    for piece_start, piece_end in _split_on(page, start, end, separator):
+        if page.length(piece_start, piece_end) < CHUNK_SIZE:
+            small.append((piece_start, piece_end))
+            continue
+
+        if small:
+            yield from _merge(page, small)
+            small = []
+
+        if remaining:
+            yield from _split(page, piece_start, piece_end, remaining)
+        else:
+            span = page.strip(piece_start, piece_end)
+            if span[0] < span[1]:
+                yield span
+
+    if small:
+        yield from _merge(page, small)
+
+def iter_chunk_spans(pages: Iterable[str]) -> Iterator[tuple[int, int, int]]:
+    # Yields (start, end, page) with offsets into "\n".join(pages) and
+    # 1-based page numbers. Chunks never cross a page boundary.
+    offset = 0
+    for number, text in enumerate(pages, start=1):
+        page = _Page(text)
+        for start, end in _split(page, 0, len(text), SEPARATORS):
+            yield offset + start, offset + end, number
+        offset += len(text) + 1
 
 def chunk_text(text: str) -> list[str]:
-    splitter = get_text_splitter()
-    return splitter.split_text(text)
+    return [text[start:end] for start, end, _ in iter_chunk_spans([text])]
@@ -1,17 +1,65 @@
-# Chunking
-CHUNK_SIZE = 500
-CHUNK_OVERLAP = 100
+# Documents
+DOCUMENTS_DIR = "data/documents"
+# The watcher waits this long after the last filesystem event for a file
+# before re-ingesting it, so a file being copied in is only processed once.
+WATCH_DEBOUNCE_SECONDS = 2.0
+
+# Chunking (sizes are in embedding-model tokens)
+CHUNK_SIZE = 128
+CHUNK_OVERLAP = 25
+CHUNK_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+
+# PDF text extraction cache, keyed by file content hash
+EXTRACTION_CACHE_DIR = "./extraction_cache"
+EXTRACTION_CACHE_MAX_BYTES = 512 * 1024 * 1024
 
 # Embeddings
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" runs the full-precision model; "onnx" runs the int8 export
+# created by `python quantize.py` on ONNX Runtime.
+EMBEDDING_BACKEND = "torch"
+ONNX_MODEL_DIR = "./onnx_models/all-MiniLM-L6-v2"
+# One of "arm64", "avx2", "avx512", "avx512_vnni"; match the host CPU
+ONNX_QUANTIZATION = "avx512_vnni"
 
 # Vector DB
 COLLECTION_NAME = "rag_documents"
 VECTOR_DB_PATH = "./qdrant_data"
+# Qdrant server, e.g. "http://localhost:6333". When set, processes talk to
+# the server over gRPC instead of locking VECTOR_DB_PATH, so ingestion and
+# query workers can share one index. Start one with the qdrant binary or
+# `docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant`.
+QDRANT_URL = None
+QDRANT_GRPC_PORT = 6334
+QDRANT_PREFER_GRPC = True
+QDRANT_TIMEOUT = 10
+# Points are partitioned across this many local stores by hashing their ID
+# and searched in parallel. 1 keeps the single unsharded store. With
+# QDRANT_URL set this is the server-side shard count instead.
+NUM_SHARDS = 1
+# COLLECTION_NAME is an alias onto "<COLLECTION_NAME>@v<n>" once a versioned
+# re-index has run; this many versions are kept around for rollback.
+KEEP_VERSIONS = 2
 
 # Retrieval
 TOP_K = 5
 HNSW_EF_SEARCH = 100
+# Two-level search: pick the HIERARCHICAL_TOP_DOCUMENTS closest documents by
+# their mean chunk vector, then search only those documents' chunks.
+# Server mode only: local Qdrant has no payload index, so the filtered
+# second stage is slower than a flat search there.
+HIERARCHICAL_SEARCH = False
+HIERARCHICAL_TOP_DOCUMENTS = 5
+
+# Reranking
+# When enabled, RERANK_CANDIDATES bi-encoder hits are rescored by a local
+# cross-encoder and only the best RERANK_TOP_K are sent to the LLM.
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20
+RERANK_TOP_K = 3
+RERANK_BATCH_SIZE = 32
+RERANK_CACHE_SIZE = 10000
 
 # LLM
 OLLAMA_MODEL = "deepseek-r1"
@@ -1,9 +1,24 @@
 from sentence_transformers import SentenceTransformer
-from config import EMBEDDING_MODEL
+from config import EMBEDDING_MODEL, EMBEDDING_BACKEND, ONNX_MODEL_DIR, ONNX_QUANTIZATION
+
+def onnx_model_file() -> str:
+    return f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+
+def load_model(backend: str = EMBEDDING_BACKEND) -> SentenceTransformer:
+    if backend == "onnx":
+        # int8 export produced once by `python quantize.py`
+        return SentenceTransformer(
+            ONNX_MODEL_DIR,
+            backend="onnx",
+            model_kwargs={"file_name": onnx_model_file()}
+        )
+    if backend == "torch":
+        return SentenceTransformer(EMBEDDING_MODEL)
+    raise ValueError(f"Unknown embedding backend: {backend}")
 
 class EmbeddingModel:
-    def __init__(self):
-        self.model = SentenceTransformer(EMBEDDING_MODEL)
+    def __init__(self, backend: str = EMBEDDING_BACKEND):
+        self.model = load_model(backend)
         self.dimension = self.model.get_sentence_embedding_dimension()
 
     def embed(self, texts: list[str]):
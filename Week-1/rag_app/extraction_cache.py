@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import zlib
+from pathlib import Path
+
+import pypdf
+from config import EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES
+
+# Bump the suffix whenever load_pages changes how text is extracted, so
+# entries written by the old logic stop matching.
+EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}-1"
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def page_offsets(pages: list[str]) -> list[int]:
+    # Start of each page in "\n".join(pages)
+    offsets, position = [], 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 1
+    return offsets
+
+class ExtractionCache:
+    def __init__(self, cache_dir: str = EXTRACTION_CACHE_DIR, max_bytes: int = EXTRACTION_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, path: str) -> str:
+        return hashlib.sha256(f"{file_hash(path)}:{EXTRACTOR_VERSION}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.z"
+
+    def get(self, key: str):
+        entry = self._entry_path(key)
+        try:
+            data = json.loads(zlib.decompress(entry.read_bytes()))
+        except (FileNotFoundError, zlib.error, ValueError):
+            return None
+
+        # Touch so eviction drops the least recently used entries first
+        os.utime(entry)
+        return data["pages"], data["offsets"]
+
+    def put(self, key: str, pages: list[str]):
+        data = {"pages": pages, "offsets": page_offsets(pages)}
+        entry = self._entry_path(key)
+
+        tmp = entry.with_suffix(".tmp")
+        tmp.write_bytes(zlib.compress(json.dumps(data).encode(), 6))
+        os.replace(tmp, entry)
+
+        self.evict()
+
+    def evict(self):
+        entries = sorted(self.cache_dir.glob("*.json.z"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            entry.unlink(missing_ok=True)
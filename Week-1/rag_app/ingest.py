@@ -1,25 +1,58 @@
+import sys
+import time
+
 from pypdf import PdfReader
-from chunking import chunk_text
+from chunking import iter_chunk_spans
+from extraction_cache import ExtractionCache
 from vector_store import VectorStore
+from config import COLLECTION_NAME
+
+_cache = None
+
+def load_pages(path: str) -> list[str]:
+    global _cache
+    _cache = _cache or ExtractionCache()
+
+    key = _cache.key(path)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached[0]
 
-def load_pdf(path: str) -> str:
     reader = PdfReader(path)
-    return "\n".join(page.extract_text() for page in reader.pages)
+    pages = [page.extract_text() for page in reader.pages]
+    _cache.put(key, pages)
+    return pages
 
-def ingest_pdf(path: str):
+def load_pdf(path: str) -> str:
+    return "\n".join(load_pages(path))
+
+def ingest_pdf(path: str, store: VectorStore = None, collection_name: str = COLLECTION_NAME) -> int:
     print(f"Ingesting document: {path}")
 
-    text = load_pdf(path)
-    chunks = chunk_text(text)
+    pages = load_pages(path)
+    text = "\n".join(pages)
+    spans = list(iter_chunk_spans(pages))
+    chunks = [text[start:end] for start, end, _ in spans]
 
-    store = VectorStore()
-    store.upsert(
+    store = store or VectorStore()
+    metadata = {"source": path, "ingested_at": time.time()}
+    vectors = store.upsert(
         texts=chunks,
-        metadata={"source": path}
+        metadata=metadata,
+        collection_name=collection_name,
+        payloads=[{"page": page, "start": start, "end": end} for start, end, page in spans]
     )
+    if chunks:
+        store.upsert_document(path, vectors, collection_name=collection_name, metadata=metadata)
+
+    # Drop whatever an earlier ingest of this file left behind
+    store.delete_source(path, collection_name=collection_name, before=metadata["ingested_at"])
 
     print(f"Successfully ingested {len(chunks)} chunks.")
+    return len(chunks)
 
 
 if __name__ == "__main__":
-    ingest_pdf("data/documents/sample.pdf")
+    store = VectorStore()
+    for path in sys.argv[1:] or ["data/documents/sample.pdf"]:
+        ingest_pdf(path, store=store)
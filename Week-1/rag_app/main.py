@@ -1,12 +1,29 @@
-from ingest import ingest_pdf
+import glob
+import os
+
 from rag_pipeline import RAGPipeline
+from versioning import reindex_in_background
+from watcher import DocumentWatcher
+from config import QDRANT_URL, DOCUMENTS_DIR
 
 if __name__ == "__main__":
-    # Ingest once
-    ingest_pdf("data/documents/sample.pdf")
-
     rag = RAGPipeline()
 
+    # Build a fresh index version in the background; queries keep reading
+    # the current version until the new one is validated and swapped in.
+    # Against a Qdrant server, ingestion runs as its own process instead
+    # (`python versioning.py reindex <pdf>...` and `python watcher.py`).
+    if not QDRANT_URL:
+        paths = sorted(glob.glob(os.path.join(DOCUMENTS_DIR, "**", "*.pdf"), recursive=True))
+
+        # Later additions, edits and deletions are applied to the live index.
+        # Those made during the re-index are held until it has promoted, as
+        # writes to the outgoing version would be lost.
+        watcher = DocumentWatcher(rag.retriever.store)
+        watcher.pause()
+        watcher.start()
+        reindex_in_background(rag.retriever.store, paths, on_done=watcher.resume)
+
     while True:
         query = input("\nAsk a question (or 'exit'): ")
         if query.lower() == "exit":
@@ -0,0 +1,61 @@
+import sys
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+from config import EMBEDDING_MODEL, ONNX_MODEL_DIR, ONNX_QUANTIZATION
+from embeddings import load_model
+
+# Minimum per-sentence cosine similarity between int8 and PyTorch vectors
+PARITY_THRESHOLD = 0.98
+
+SAMPLE_SENTENCES = [
+    "What is the refund policy for annual subscriptions?",
+    "Employees accrue paid time off at a rate of 1.5 days per month.",
+    "The quarterly report shows revenue growth of 12 percent.",
+    "Configure the database connection pool before starting the service.",
+    "Retrieval-augmented generation grounds answers in source documents.",
+    "Section 4.2 describes the incident escalation procedure.",
+    "A short one.",
+    "",
+]
+
+def convert():
+    print(f"Exporting {EMBEDDING_MODEL} to ONNX in {ONNX_MODEL_DIR}")
+    model = SentenceTransformer(EMBEDDING_MODEL, backend="onnx")
+    model.save_pretrained(ONNX_MODEL_DIR)
+
+    print(f"Quantizing to int8 ({ONNX_QUANTIZATION})")
+    export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION, ONNX_MODEL_DIR)
+
+def embeddings_per_second(model: SentenceTransformer, texts: list[str]) -> float:
+    start = time.perf_counter()
+    model.encode(texts, batch_size=64)
+    return len(texts) / (time.perf_counter() - start)
+
+def parity_check() -> bool:
+    reference = load_model("torch")
+    quantized = load_model("onnx")
+
+    expected = reference.encode(SAMPLE_SENTENCES, normalize_embeddings=True)
+    actual = quantized.encode(SAMPLE_SENTENCES, normalize_embeddings=True)
+    similarity = np.sum(expected * actual, axis=1)
+
+    print(f"Cosine similarity vs PyTorch: min={similarity.min():.4f} mean={similarity.mean():.4f}")
+
+    corpus = SAMPLE_SENTENCES * 128
+    print(f"PyTorch: {embeddings_per_second(reference, corpus):.0f} embeddings/sec")
+    print(f"ONNX int8: {embeddings_per_second(quantized, corpus):.0f} embeddings/sec")
+
+    return bool(similarity.min() >= PARITY_THRESHOLD)
+
+
+if __name__ == "__main__":
+    if "--check-only" not in sys.argv:
+        convert()
+
+    if not parity_check():
+        print(f"Parity check failed (threshold {PARITY_THRESHOLD})")
+        sys.exit(1)
+
+    print("Parity check passed. Set EMBEDDING_BACKEND = \"onnx\" in config.py to use it.")
@@ -2,8 +2,8 @@ from retriever import Retriever
 from llm import LLM
 
 class RAGPipeline:
-    def __init__(self):
-        self.retriever = Retriever()
+    def __init__(self, store=None):
+        self.retriever = Retriever(store)
         self.llm = LLM()
 
     def run(self, query: str) -> str:
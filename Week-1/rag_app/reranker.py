@@ -0,0 +1,34 @@
+from collections import OrderedDict
+import hashlib
+
+from sentence_transformers import CrossEncoder
+from config import RERANK_MODEL, RERANK_BATCH_SIZE, RERANK_CACHE_SIZE
+
+class Reranker:
+    def __init__(self):
+        self.model = CrossEncoder(RERANK_MODEL)
+        self.cache = OrderedDict()
+
+    def _key(self, query: str, text: str):
+        return query, hashlib.sha1(text.encode()).hexdigest()
+
+    def rerank(self, query: str, texts: list[str], top_k: int) -> list[str]:
+        keys = [self._key(query, text) for text in texts]
+        missing = [i for i, key in enumerate(keys) if key not in self.cache]
+
+        if missing:
+            # Score every uncached candidate in a single batched pass
+            scores = self.model.predict(
+                [(query, texts[i]) for i in missing],
+                batch_size=RERANK_BATCH_SIZE
+            )
+            for i, score in zip(missing, scores):
+                self.cache[keys[i]] = float(score)
+
+        for key in keys:
+            self.cache.move_to_end(key)
+        while len(self.cache) > RERANK_CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+        ranked = sorted(zip(texts, keys), key=lambda item: self.cache[item[1]], reverse=True)
+        return [text for text, _ in ranked[:top_k]]
@@ -1,20 +1,47 @@
 from embeddings import EmbeddingModel
 from vector_store import VectorStore
-from config import COLLECTION_NAME, TOP_K, HNSW_EF_SEARCH
+from config import (
+    TOP_K, RERANK_ENABLED, RERANK_CANDIDATES, RERANK_TOP_K,
+    HIERARCHICAL_SEARCH, HIERARCHICAL_TOP_DOCUMENTS, QDRANT_URL,
+)
 
 class Retriever:
-    def __init__(self):
-        self.store = VectorStore()
+    def __init__(self, store: VectorStore = None):
+        self.store = store or VectorStore()
         self.embedder = EmbeddingModel()
+        self.reranker = None
+
+        # Local Qdrant evaluates the stage-two source filter in Python over
+        # every chunk, which makes two-level search slower than flat search
+        # (see benchmark_hierarchical.py). Only a server uses the index.
+        self.hierarchical = HIERARCHICAL_SEARCH and bool(QDRANT_URL)
+        if HIERARCHICAL_SEARCH and not QDRANT_URL:
+            print("HIERARCHICAL_SEARCH needs QDRANT_URL; using flat search")
+
+        if RERANK_ENABLED:
+            from reranker import Reranker
+            self.reranker = Reranker()
+
+    def _search(self, query_vector: list[float], limit: int):
+        if self.hierarchical:
+            return self.store.search_hierarchical(
+                query_vector, limit=limit, num_documents=HIERARCHICAL_TOP_DOCUMENTS
+            )
+        return self.store.search(query_vector, limit=limit)
 
     def retrieve(self, query: str) -> str:
         query_vector = self.embedder.embed([query])[0].tolist()
 
-        results = self.store.client.query_points(
-            collection_name=COLLECTION_NAME,
-            query=query_vector,
-            limit=TOP_K,
-            search_params={"hnsw_ef": HNSW_EF_SEARCH}
-        )
+        if self.reranker is None:
+            points = self._search(query_vector, limit=TOP_K)
+            return "\n\n".join(point.payload["text"] for point in points)
 
-        return "\n\n".join(point.payload["text"] for point in results.points)
+        # Over-fetch with the bi-encoder, then keep only the few chunks the
+        # cross-encoder rates highest so the LLM prompt stays short.
+        points = self._search(query_vector, limit=RERANK_CANDIDATES)
+        texts = self.reranker.rerank(
+            query,
+            [point.payload["text"] for point in points],
+            top_k=RERANK_TOP_K
+        )
+        return "\n\n".join(texts)
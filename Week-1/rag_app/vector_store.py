@@ -1,17 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import atexit
+import heapq
+import threading
+import uuid
+import zlib
+
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, HnswConfigDiff, PointStruct
+from qdrant_client.models import (
+    VectorParams, Distance, HnswConfigDiff, PointStruct, PayloadSchemaType,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    Filter, FieldCondition, MatchValue, MatchAny, Range, FilterSelector,
+)
+import numpy as np
 from embeddings import EmbeddingModel
-from config import VECTOR_DB_PATH, COLLECTION_NAME
-import uuid
+from config import (
+    VECTOR_DB_PATH, COLLECTION_NAME, NUM_SHARDS, HNSW_EF_SEARCH,
+    QDRANT_URL, QDRANT_GRPC_PORT, QDRANT_PREFER_GRPC, QDRANT_TIMEOUT,
+)
+
+
+def documents_collection(collection_name: str) -> str:
+    # Each source also gets one document-level point holding the mean of its
+    # chunk vectors. Those live in a companion collection rather than next to
+    # the chunks: local Qdrant evaluates filters in Python on every point, so
+    # a "chunks only" filter would slow down every flat search.
+    return f"{collection_name}__docs"
+
+
+class LockedClient:
+    # Local Qdrant is not thread-safe: a search running while another thread
+    # upserts or deletes can read half-updated arrays. Every call on a local
+    # client is serialised through its lock; shards have separate clients,
+    # so the shard fan-out still runs in parallel.
+    def __init__(self, client: QdrantClient):
+        self.client = client
+        self.lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self.lock:
+                return attr(*args, **kwargs)
+        return locked
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(path: str = None) -> QdrantClient:
+    # One client per location per process. A local path can only be opened
+    # once, and a server client keeps a single multiplexed gRPC channel that
+    # every VectorStore in the process can share.
+    location = path or QDRANT_URL
+    with _clients_lock:
+        if location not in _clients:
+            if path:
+                _clients[location] = LockedClient(QdrantClient(path=path))
+            else:
+                _clients[location] = QdrantClient(
+                    url=QDRANT_URL,
+                    grpc_port=QDRANT_GRPC_PORT,
+                    prefer_grpc=QDRANT_PREFER_GRPC,
+                    timeout=QDRANT_TIMEOUT
+                )
+        return _clients[location]
+
+
+@atexit.register
+def _close_clients():
+    # Release local store locks before interpreter teardown
+    for client in _clients.values():
+        client.close()
+
+
+def shard_for(point_id: str, num_shards: int = NUM_SHARDS) -> int:
+    # crc32 rather than hash(): the assignment must be stable across processes
+    return zlib.crc32(point_id.encode()) % num_shards
+
 
 class VectorStore:
     def __init__(self):
-        self.client = QdrantClient(path=VECTOR_DB_PATH)
         self.embedder = EmbeddingModel()
 
-        if not self.client.collection_exists(COLLECTION_NAME):
-            self.client.create_collection(
-                collection_name=COLLECTION_NAME,
+        if QDRANT_URL:
+            # The server shards collections itself and fans searches out
+            self.clients = [get_client()]
+            self.pool = None
+        elif NUM_SHARDS > 1:
+            # One local store per shard so each shard has its own file lock
+            # and can be searched on its own core.
+            self.clients = [
+                get_client(f"{VECTOR_DB_PATH}/shard_{i}")
+                for i in range(NUM_SHARDS)
+            ]
+            self.pool = ThreadPoolExecutor(max_workers=NUM_SHARDS)
+        else:
+            self.clients = [get_client(VECTOR_DB_PATH)]
+            self.pool = None
+
+        self.client = self.clients[0]
+
+        # COLLECTION_NAME may be an alias onto a versioned collection, in
+        # which case it already exists and is left alone.
+        self.create_collection(COLLECTION_NAME)
+
+    def create_collection(self, collection_name: str):
+        for client in self.clients:
+            for name in (collection_name, documents_collection(collection_name)):
+                self._create_collection(client, name)
+
+    def _create_collection(self, client: QdrantClient, collection_name: str):
+        if not client.collection_exists(collection_name):
+            client.create_collection(
+                collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=self.embedder.dimension,
                     distance=Distance.COSINE
@@ -19,24 +125,157 @@ class VectorStore:
                 hnsw_config=HnswConfigDiff(
                     m=32,
                     ef_construct=200
-                )
+                ),
+                shard_number=NUM_SHARDS if QDRANT_URL else None
             )
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name="source",
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+
+    def delete_collection(self, collection_name: str):
+        for client in self.clients:
+            client.delete_collection(collection_name)
+            client.delete_collection(documents_collection(collection_name))
+
+    def collections(self) -> list[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def aliases(self) -> dict[str, str]:
+        return {a.alias_name: a.collection_name for a in self.client.get_aliases().aliases}
+
+    def switch_alias(self, alias: str, collection_name: str):
+        current = self.aliases()
+        collections = self.collections()
+
+        # The chunk alias and its document alias move together
+        operations = []
+        legacy = []
+        for name, target in ((alias, collection_name),
+                             (documents_collection(alias), documents_collection(collection_name))):
+            # A plain collection left over from before versioning occupies
+            # the alias name and has to go first.
+            if name not in current and name in collections:
+                legacy.append(name)
 
-    def upsert(self, texts: list[str], metadata: dict):
+            if name in current:
+                operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)))
+            operations.append(CreateAliasOperation(create_alias=CreateAlias(
+                collection_name=target,
+                alias_name=name
+            )))
+
+        # Delete and re-create in one request, so readers never see an
+        # alias missing. Local stores are held locked across the legacy
+        # delete as well, so queries wait instead of finding neither.
+        with ExitStack() as stack:
+            for client in self.clients:
+                if isinstance(client, LockedClient):
+                    stack.enter_context(client.lock)
+            for client in self.clients:
+                for name in legacy:
+                    client.delete_collection(name)
+                client.update_collection_aliases(change_aliases_operations=operations)
+
+    def count(self, collection_name: str = COLLECTION_NAME, count_filter: Filter = None) -> int:
+        return sum(
+            client.count(collection_name, count_filter=count_filter).count
+            for client in self.clients
+        )
+
+    def upsert(self, texts: list[str], metadata: dict, collection_name: str = COLLECTION_NAME,
+               payloads: list[dict] = None):
         vectors = self.embedder.embed(texts)
-        points = []
+        shards = [[] for _ in self.clients]
 
-        for text, vector in zip(texts, vectors):
-            points.append(PointStruct(
-                id=str(uuid.uuid4()),
+        for text, vector, extra in zip(texts, vectors, payloads or [{}] * len(texts)):
+            point_id = str(uuid.uuid4())
+            shards[shard_for(point_id, len(self.clients))].append(PointStruct(
+                id=point_id,
                 vector=vector.tolist(),
                 payload={
                     "text": text,
-                    **metadata
+                    **metadata,
+                    **extra
                 }
             ))
 
-        self.client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=points
+        for client, points in zip(self.clients, shards):
+            if points:
+                client.upsert(
+                    collection_name=collection_name,
+                    points=points
+                )
+
+        return vectors
+
+    def upsert_document(self, source: str, chunk_vectors, collection_name: str = COLLECTION_NAME,
+                        metadata: dict = None):
+        vector = np.mean(chunk_vectors, axis=0)
+        vector = vector / np.linalg.norm(vector)
+
+        # Deterministic ID so re-ingesting a source replaces its document point
+        point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, source))
+        self.clients[shard_for(point_id, len(self.clients))].upsert(
+            collection_name=documents_collection(collection_name),
+            points=[PointStruct(
+                id=point_id,
+                vector=vector.tolist(),
+                payload={"source": source, **(metadata or {})}
+            )]
+        )
+
+    def delete_source(self, source: str, collection_name: str = COLLECTION_NAME, before: float = None):
+        # With `before`, only points ingested earlier than that timestamp go,
+        # which lets a re-ingest write the new points first and then drop the
+        # old ones without a window where the document is missing.
+        must_not = []
+        if before is not None:
+            must_not.append(FieldCondition(key="ingested_at", range=Range(gte=before)))
+
+        selector = FilterSelector(filter=Filter(
+            must=[FieldCondition(key="source", match=MatchValue(value=source))],
+            must_not=must_not
+        ))
+        for client in self.clients:
+            for name in (collection_name, documents_collection(collection_name)):
+                client.delete(collection_name=name, points_selector=selector)
+
+    def _search_shard(self, client: QdrantClient, query_vector: list[float], limit: int,
+                      collection_name: str, query_filter: Filter):
+        return client.query_points(
+            collection_name=collection_name,
+            query=query_vector,
+            query_filter=query_filter,
+            limit=limit,
+            search_params={"hnsw_ef": HNSW_EF_SEARCH}
+        ).points
+
+    def search(self, query_vector: list[float], limit: int, collection_name: str = COLLECTION_NAME,
+               query_filter: Filter = None):
+        if self.pool is None:
+            return self._search_shard(self.client, query_vector, limit, collection_name, query_filter)
+
+        # Every shard returns its own top-k; the global top-k is among them.
+        per_shard = self.pool.map(
+            lambda client: self._search_shard(client, query_vector, limit, collection_name, query_filter),
+            self.clients
         )
+        return heapq.nlargest(
+            limit,
+            (point for points in per_shard for point in points),
+            key=lambda point: point.score
+        )
+
+    def search_hierarchical(self, query_vector: list[float], limit: int, num_documents: int,
+                            collection_name: str = COLLECTION_NAME):
+        # Pick the closest documents first, then rank only their chunks
+        documents = self.search(query_vector, num_documents, documents_collection(collection_name))
+        if not documents:
+            return []
+
+        sources = [point.payload["source"] for point in documents]
+        return self.search(query_vector, limit, collection_name, Filter(
+            must=[FieldCondition(key="source", match=MatchAny(any=sources))]
+        ))
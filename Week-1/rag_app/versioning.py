@@ -0,0 +1,127 @@
+import re
+import sys
+import threading
+
+from ingest import ingest_pdf
+from vector_store import VectorStore
+from config import COLLECTION_NAME, KEEP_VERSIONS
+
+# Live queries read COLLECTION_NAME, which is an alias onto one of the
+# versioned collections "<COLLECTION_NAME>@v<n>". A re-index builds the next
+# version off to the side and only then moves the alias onto it.
+VERSION_PATTERN = re.compile(rf"^{re.escape(COLLECTION_NAME)}@v(\d+)$")
+# Cosine score a stored vector must reach against itself
+SELF_MATCH_SCORE = 0.999
+
+def version_name(version: int) -> str:
+    return f"{COLLECTION_NAME}@v{version}"
+
+def list_versions(store: VectorStore) -> list[int]:
+    versions = []
+    for name in store.collections():
+        match = VERSION_PATTERN.match(name)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+def live_version(store: VectorStore):
+    match = VERSION_PATTERN.match(store.aliases().get(COLLECTION_NAME, ""))
+    return int(match.group(1)) if match else None
+
+def validate_version(store: VectorStore, version: int, expected_points: int):
+    name = version_name(version)
+
+    count = store.count(name)
+    if count == 0 or count != expected_points:
+        raise RuntimeError(f"{name} has {count} chunks, expected {expected_points}")
+
+    # A stored vector must find itself, otherwise the index is unusable.
+    # Compare scores, not IDs: chunks with identical text share a vector.
+    for client in store.clients:
+        points, _ = client.scroll(name, limit=1, with_vectors=True)
+        if points:
+            hits = store.search(points[0].vector, limit=1, collection_name=name)
+            if not hits or hits[0].score < SELF_MATCH_SCORE:
+                raise RuntimeError(f"{name} failed the self-retrieval probe")
+            return
+
+def build_version(store: VectorStore, paths: list[str]) -> int:
+    version = max(list_versions(store), default=0) + 1
+    name = version_name(version)
+
+    print(f"Building {name}")
+    store.create_collection(name)
+
+    # A version that did not validate must not linger: GC and rollback
+    # would count it as a good one
+    try:
+        expected = sum(ingest_pdf(path, store=store, collection_name=name) for path in paths)
+        validate_version(store, version, expected)
+    except BaseException:
+        store.delete_collection(name)
+        print(f"Deleted unfinished {name}")
+        raise
+    return version
+
+def promote(store: VectorStore, version: int):
+    store.switch_alias(COLLECTION_NAME, version_name(version))
+    print(f"{COLLECTION_NAME} -> {version_name(version)}")
+
+def garbage_collect(store: VectorStore, keep: int = KEEP_VERSIONS):
+    live = live_version(store)
+    for version in list_versions(store)[:-keep]:
+        if version != live:
+            store.delete_collection(version_name(version))
+            print(f"Deleted {version_name(version)}")
+
+def reindex(store: VectorStore, paths: list[str]) -> int:
+    try:
+        version = build_version(store, paths)
+    except Exception as e:
+        print(f"Re-index failed, {COLLECTION_NAME} left unchanged: {e}")
+        raise
+
+    promote(store, version)
+    garbage_collect(store)
+    return version
+
+def reindex_in_background(store: VectorStore, paths: list[str], on_done=None) -> threading.Thread:
+    # on_done runs once the new version is live, or once the build has
+    # failed and the old one stays live
+    def run():
+        try:
+            reindex(store, paths)
+        finally:
+            if on_done:
+                on_done()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def rollback(store: VectorStore) -> int:
+    live = live_version(store)
+    older = [version for version in list_versions(store) if live is None or version < live]
+    if not older:
+        raise RuntimeError("No older version to roll back to")
+
+    promote(store, older[-1])
+    return older[-1]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    store = VectorStore()
+
+    if command == "reindex":
+        reindex(store, sys.argv[2:] or ["data/documents/sample.pdf"])
+    elif command == "rollback":
+        rollback(store)
+    elif command == "list":
+        live = live_version(store)
+        for version in list_versions(store):
+            marker = " (live)" if version == live else ""
+            print(f"{version_name(version)}: {store.count(version_name(version))} points{marker}")
+    else:
+        print("Usage: python versioning.py [list | reindex <pdf>... | rollback]")
+        sys.exit(1)
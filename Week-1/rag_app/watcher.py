@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from extraction_cache import file_hash
+from ingest import ingest_pdf
+from vector_store import VectorStore
+from config import DOCUMENTS_DIR, WATCH_DEBOUNCE_SECONDS
+
+class DocumentWatcher(FileSystemEventHandler):
+    def __init__(self, store: VectorStore, directory: str = DOCUMENTS_DIR,
+                 debounce: float = WATCH_DEBOUNCE_SECONDS):
+        self.store = store
+        self.directory = directory
+        self.debounce = debounce
+        self.observer = None
+
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.timer = None
+        self.pending = {}  # path -> time of the first unprocessed event
+        self.hashes = {}   # path -> content hash at the last sync
+        self.max_lag = 0.0
+        self.paused = False
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        now = time.time()
+
+        with self.lock:
+            for path in paths:
+                if path and path.lower().endswith(".pdf"):
+                    self.pending.setdefault(os.fsdecode(path), now)
+
+            if self.pending:
+                if self.timer:
+                    self.timer.cancel()
+                self.timer = threading.Timer(self.debounce, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        # One flush at a time; events arriving meanwhile wait for the next
+        with self.sync_lock:
+            with self.lock:
+                if self.paused:
+                    return
+                pending, self.pending = self.pending, {}
+
+            for path, first_seen in pending.items():
+                try:
+                    self.sync(path, first_seen)
+                except Exception as e:
+                    print(f"[watcher] Failed to sync {path}: {e}")
+
+    def sync(self, path: str, first_seen: float):
+        if os.path.exists(path):
+            digest = file_hash(path)
+            if self.hashes.get(path) == digest:
+                return
+            ingest_pdf(path, store=self.store)
+            self.hashes[path] = digest
+            action = "updated"
+        else:
+            self.store.delete_source(path)
+            self.hashes.pop(path, None)
+            action = "removed"
+
+        lag = time.time() - first_seen
+        self.max_lag = max(self.max_lag, lag)
+        print(f"[watcher] {action} {path}, freshness lag {lag:.2f}s (max {self.max_lag:.2f}s)")
+
+    def pause(self):
+        # Events keep queueing but are only applied after resume(), e.g.
+        # while a re-index builds the version that will replace the live one
+        with self.lock:
+            self.paused = True
+
+    def resume(self):
+        with self.lock:
+            self.paused = False
+        self.flush()
+
+    def start(self):
+        self.observer = Observer()
+        self.observer.schedule(self, self.directory, recursive=True)
+        self.observer.daemon = True
+        self.observer.start()
+        print(f"[watcher] Watching {self.directory}")
+
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+
+
+if __name__ == "__main__":
+    watcher = DocumentWatcher(VectorStore())
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
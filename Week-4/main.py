@@ -9,7 +9,7 @@ import sys
 from dotenv import load_dotenv
 
 from agent import create_agent
-from tools import vectorize_documents
+from tools import vectorize_documents, get_mcp_stats, get_rag_stats
 
 
 def print_banner():
@@ -31,7 +31,9 @@ COMMANDS:
   /tools      - List available tools
   /examples   - Show example queries
   /clear      - Clear conversation history
-  /vectorize  - Re-vectorize HR policy documents
+  /vectorize  - Re-vectorize changed HR policy documents
+  /vectorize full - Rebuild the HR policy index from scratch
+  /stats      - Show MCP session pool and query cache stats
   /quit       - Exit
 
 EXAMPLE QUERIES:
@@ -77,6 +79,20 @@ def print_tools(agent):
         print(f"   {desc[:200]}...")
 
 
+def print_stats():
+    sections = [
+        ("MCP SESSION POOL", get_mcp_stats(), "No insurance searches yet."),
+        ("HR QUERY EMBEDDING CACHE", get_rag_stats(), "No HR policy searches yet."),
+    ]
+    for title, stats, empty in sections:
+        print(f"\n{title}:")
+        print("-" * 50)
+        if not stats:
+            print(f"   {empty}")
+        for name, value in stats.items():
+            print(f"   {name}: {value}")
+
+
 def main():
     load_dotenv()
 
@@ -123,9 +139,11 @@ def main():
                 elif cmd == "/clear":
                     agent.clear_history()
                     print("Conversation history cleared.")
-                elif cmd == "/vectorize":
+                elif cmd == "/stats":
+                    print_stats()
+                elif cmd in ["/vectorize", "/vectorize full"]:
                     print("Vectorizing documents...")
-                    vectorize_documents()
+                    vectorize_documents(full=cmd.endswith("full"))
                     print("Done!")
                 else:
                     print(f" Unknown command: {cmd}")
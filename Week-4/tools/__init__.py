@@ -6,8 +6,8 @@ Presidio Internal Research Agent Tools
 3. Web Search Tool - Fetch industry benchmarks and trends (DuckDuckGo)
 """
 
-from .rag_tool import search_hr_policies, get_rag_tools, vectorize_documents
-from .mcp_tool import search_insurance_docs, get_mcp_tools
+from .rag_tool import search_hr_policies, get_rag_tools, get_rag_stats, vectorize_documents
+from .mcp_tool import search_insurance_docs, get_mcp_tools, get_mcp_stats
 from .web_search_tool import web_search, get_web_search_tools
 
 
@@ -23,9 +23,11 @@ def get_all_tools():
 __all__ = [
     "search_hr_policies",
     "get_rag_tools",
+    "get_rag_stats",
     "vectorize_documents",
     "search_insurance_docs",
     "get_mcp_tools",
+    "get_mcp_stats",
     "web_search",
     "get_web_search_tools",
     "get_all_tools",
@@ -2,9 +2,10 @@
 MCP Tool - Insurance document search via Model Context Protocol
 
 The MCP server (server.py) connects to Google Docs.
-The client (insurance_tool.py) wraps it as a LangChain tool.
+The client (insurance_tool.py) wraps it as a LangChain tool and keeps a
+small pool of server sessions open for the agent's lifetime.
 """
 
-from .insurance_tool import search_insurance_docs, get_mcp_tools
+from .insurance_tool import search_insurance_docs, get_mcp_tools, get_mcp_stats
 
-__all__ = ["search_insurance_docs", "get_mcp_tools"]
+__all__ = ["search_insurance_docs", "get_mcp_tools", "get_mcp_stats"]
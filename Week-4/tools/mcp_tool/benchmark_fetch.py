@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compare the server's doc fetch modes on the insurance documents
+
+For each FETCH_MODE (full document JSON, field-masked JSON, plain-text
+export) reports the response bytes, request time and parse time per doc:
+
+    python benchmark_fetch.py
+    python benchmark_fetch.py --fake-docs ./sample_docs --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import server
+
+MODES = ["full", "fields", "export"]
+
+
+def measure(doc_id: str, mode: str) -> dict:
+    request = server.doc_request(doc_id, mode)
+    # Keep the raw body, so transfer size and parse time can be measured apart
+    request.postproc = lambda resp, content: content
+
+    start = time.perf_counter()
+    content = request.execute()
+    fetched = time.perf_counter()
+
+    if mode == "export":
+        text = server.parse_export(content)
+    else:
+        text = server.parse_document(json.loads(content))
+    parsed = time.perf_counter()
+
+    return {
+        "bytes": len(content),
+        "fetch_ms": (fetched - start) * 1000,
+        "parse_ms": (parsed - fetched) * 1000,
+        "chars": len(text),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Google Docs fetch modes")
+    parser.add_argument("--fake-docs", help="Benchmark against fake_google over this directory")
+    parser.add_argument("--repeat", type=int, default=3, help="Fetches per doc and mode")
+    parser.add_argument("--limit", type=int, default=None, help="Only the N first docs")
+    args = parser.parse_args()
+
+    if args.fake_docs:
+        server.FAKE_DOCS_DIR = args.fake_docs
+
+    docs = server.list_insurance_docs()[:args.limit]
+    if not docs:
+        print("No insurance documents found.")
+        return
+
+    print(f"{len(docs)} docs x {args.repeat} fetches per mode "
+          "(bytes are the decoded response body)\n")
+    print(f"{'mode':<8} {'KB/doc':>10} {'fetch ms':>10} {'parse ms':>10} {'chars/doc':>10}")
+
+    baseline = None
+    for mode in MODES:
+        runs = [measure(doc["id"], mode) for doc in docs for _ in range(args.repeat)]
+        kb = statistics.mean(r["bytes"] for r in runs) / 1024
+        fetch_ms = statistics.median(r["fetch_ms"] for r in runs)
+        parse_ms = statistics.median(r["parse_ms"] for r in runs)
+        chars = statistics.mean(r["chars"] for r in runs)
+
+        baseline = baseline or kb
+        print(f"{mode:<8} {kb:>10.1f} {fetch_ms:>10.2f} {parse_ms:>10.3f} {chars:>10.0f}"
+              f"   ({kb / baseline:.0%} of full)")
+
+
+if __name__ == "__main__":
+    main()
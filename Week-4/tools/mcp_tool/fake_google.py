@@ -0,0 +1,167 @@
+"""
+Local stand-in for the Google Drive v3 and Docs v1 clients used by server.py
+
+Every *.txt file in a directory is served as one Google Doc named after the
+file. Added, edited and deleted files show up in the Drive changes feed, so
+the server's mirror sync can be exercised without Google credentials:
+
+    python server.py --fake-docs ./sample_docs
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+DOC_MIME_TYPE = "application/vnd.google-apps.document"
+CHANGES_PAGE_SIZE = 100
+
+
+class FakeRequest:
+    """
+    Mimics googleapiclient's HttpRequest: the call happens on execute(), and
+    `postproc` turns the raw response body into the returned value.
+    """
+
+    def __init__(self, fn, media: bool = False):
+        self.fn = fn
+        self.postproc = (lambda resp, content: content) if media else (lambda resp, content: json.loads(content))
+
+    def execute(self, num_retries: int = 0):
+        body = self.fn()
+        content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        return self.postproc(None, content)
+
+
+class FakeGoogle:
+    """Drive + Docs service backed by a directory of .txt files."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.entries = {}
+        self.changes_log = []
+        self.lock = threading.Lock()
+        self.scan()
+
+    def scan(self):
+        """Log a change for every file added, edited or deleted since the last scan."""
+        with self.lock:
+            seen = {}
+            for path in sorted(self.root.glob("*.txt")):
+                file_id = hashlib.sha1(path.name.encode()).hexdigest()[:20]
+                modified = datetime.fromtimestamp(path.stat().st_mtime_ns / 1e9, timezone.utc)
+                seen[file_id] = {
+                    "id": file_id,
+                    "name": path.stem,
+                    "mimeType": DOC_MIME_TYPE,
+                    "modifiedTime": modified.isoformat(timespec="microseconds"),
+                    "trashed": False,
+                }
+                if self.entries.get(file_id) != seen[file_id]:
+                    self.changes_log.append({"fileId": file_id, "removed": False, "file": seen[file_id]})
+
+            for file_id in self.entries.keys() - seen.keys():
+                self.changes_log.append({"fileId": file_id, "removed": True})
+            self.entries = seen
+
+    def text(self, file_id: str) -> str:
+        return (self.root / f"{self.entries[file_id]['name']}.txt").read_text()
+
+    def files(self):
+        return FakeFiles(self)
+
+    def changes(self):
+        return FakeChanges(self)
+
+    def documents(self):
+        return FakeDocuments(self)
+
+
+class FakeFiles:
+    """drive.files()"""
+
+    def __init__(self, google: FakeGoogle):
+        self.google = google
+
+    def list(self, q: str = None, **kwargs):
+        # Only the server's insurance-docs query is supported
+        def run():
+            self.google.scan()
+            return {"files": [
+                dict(f) for f in self.google.entries.values()
+                if "insurance" in f["name"].lower()
+            ]}
+        return FakeRequest(run)
+
+    def export_media(self, fileId: str, mimeType: str):
+        # Drive's text/plain export: UTF-8 with a BOM and CRLF line endings
+        def run():
+            text = self.google.text(fileId).replace("\n", "\r\n")
+            return text.encode("utf-8-sig")
+        return FakeRequest(run, media=True)
+
+
+class FakeChanges:
+    """drive.changes(); page tokens are offsets into the change log."""
+
+    def __init__(self, google: FakeGoogle):
+        self.google = google
+
+    def getStartPageToken(self, **kwargs):
+        def run():
+            self.google.scan()
+            return {"startPageToken": str(len(self.google.changes_log))}
+        return FakeRequest(run)
+
+    def list(self, pageToken: str, **kwargs):
+        def run():
+            self.google.scan()
+            log = self.google.changes_log
+            start = int(pageToken)
+            end = start + CHANGES_PAGE_SIZE
+            res = {"changes": log[start:end]}
+            if end < len(log):
+                res["nextPageToken"] = str(end)
+            else:
+                res["newStartPageToken"] = str(len(log))
+            return res
+        return FakeRequest(run)
+
+
+class FakeDocuments:
+    """docs.documents()"""
+
+    def __init__(self, google: FakeGoogle):
+        self.google = google
+
+    def get(self, documentId: str, fields: str = None, **kwargs):
+        # Without a field mask, each run carries the index and style metadata
+        # the real API returns; with one, only the text (the server's mask)
+        def run():
+            content = []
+            index = 1
+            for line in self.google.text(documentId).splitlines(keepends=True):
+                text_run = {"content": line}
+                if fields is None:
+                    text_run["textStyle"] = {"weightedFontFamily": {"fontFamily": "Arial", "weight": 400}}
+                    element = {"startIndex": index, "endIndex": index + len(line), "textRun": text_run}
+                    paragraph = {
+                        "elements": [element],
+                        "paragraphStyle": {"namedStyleType": "NORMAL_TEXT", "direction": "LEFT_TO_RIGHT"},
+                    }
+                    content.append({"startIndex": index, "endIndex": index + len(line), "paragraph": paragraph})
+                else:
+                    content.append({"paragraph": {"elements": [{"textRun": text_run}]}})
+                index += len(line)
+
+            document = {"body": {"content": content}}
+            if fields is None:
+                document.update({
+                    "documentId": documentId,
+                    "title": self.google.entries[documentId]["name"],
+                    "documentStyle": {"pageSize": {"height": {"magnitude": 792, "unit": "PT"}}},
+                    "namedStyles": {"styles": []},
+                })
+            return document
+        return FakeRequest(run)
@@ -4,59 +4,242 @@ Wraps MCP protocol as a LangChain tool
 """
 
 import asyncio
+import os
 import sys
+import time
 from pathlib import Path
 from langchain_core.tools import tool
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from ..async_runtime import get_runtime, run_sync
+
 SERVER_PATH = Path(__file__).parent / "server.py"
 
+# Server subprocesses kept open for the agent's lifetime. One session
+# multiplexes concurrent requests, and every extra server process runs its
+# own Drive sync loop, so one is enough.
+POOL_SIZE = 1
+CALL_TIMEOUT = 60
+# Idle sessions are pinged before reuse; a failed ping respawns the server
+HEALTHCHECK_INTERVAL = 30
+PING_TIMEOUT = 5
+
+
+class MCPSession:
+    """One long-lived MCP server subprocess and its initialized session."""
+
+    def __init__(self, server_params):
+        self.server_params = server_params
+        self.session = None
+        self.startup_seconds = 0.0
+        self.last_used = 0.0
+        self.lock = asyncio.Lock()
+        self._task = None
+        self._ready = None
+        self._closing = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def _serve(self):
+        # stdio_client and ClientSession are entered and exited in this one
+        # task, which stays parked on _closing while the session is in use
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        finally:
+            self.session = None
+
+    async def start(self):
+        """Spawn the server and run the MCP handshake."""
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        start = time.perf_counter()
+
+        self._task = asyncio.create_task(self._serve())
+        ready = asyncio.create_task(self._ready.wait())
+        await asyncio.wait({self._task, ready}, return_when=asyncio.FIRST_COMPLETED)
+
+        if not self._ready.is_set():
+            ready.cancel()
+            self._task.result()
+            raise RuntimeError("MCP server exited during startup")
+
+        self.startup_seconds = time.perf_counter() - start
+        self.last_used = time.monotonic()
+
+    async def ping(self):
+        await asyncio.wait_for(self.session.send_ping(), PING_TIMEOUT)
+
+    async def call_tool(self, name: str, arguments: dict):
+        result = await asyncio.wait_for(
+            self.session.call_tool(name, arguments=arguments),
+            CALL_TIMEOUT,
+        )
+        self.last_used = time.monotonic()
+        return result
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, PING_TIMEOUT)
+        except Exception:
+            pass
+        self._task = None
+
+
+class MCPSessionPool:
+    """Round-robin pool of MCP sessions with health checks and respawn."""
+
+    def __init__(self, server_params, size: int = POOL_SIZE):
+        self.sessions = [MCPSession(server_params) for _ in range(size)]
+        self._next = 0
+        self.spawns = 0
+        self.calls = 0
+        self.call_seconds = 0.0
+        self.startup_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    async def _spawn(self, session):
+        await session.close()
+        await session.start()
+        self.spawns += 1
+        self.startup_seconds += session.startup_seconds
+
+    async def _checkout(self):
+        """Next session, (re)started or health-checked as needed."""
+        session = self.sessions[self._next % len(self.sessions)]
+        self._next += 1
+
+        async with session.lock:
+            if not session.alive:
+                await self._spawn(session)
+                return session, True
+            if time.monotonic() - session.last_used > HEALTHCHECK_INTERVAL:
+                try:
+                    await session.ping()
+                except Exception:
+                    await self._spawn(session)
+                    return session, True
+        return session, False
+
+    async def _is_dead(self, session) -> bool:
+        if not session.alive:
+            return True
+        try:
+            await session.ping()
+        except Exception:
+            return True
+        return False
+
+    async def call_tool(self, name: str, arguments: dict):
+        """Call a tool, respawning the session and retrying once if it died."""
+        for attempt in range(2):
+            session, spawned = await self._checkout()
+            start = time.perf_counter()
+            try:
+                result = await session.call_tool(name, arguments)
+            except asyncio.TimeoutError:
+                # A slow call, not a dead server: calls in flight on the
+                # same session carry on, and the search is not repeated
+                raise
+            except Exception:
+                # Tool errors leave the session usable; only a server that
+                # is gone is torn down and the call retried on a fresh one
+                async with session.lock:
+                    dead = await self._is_dead(session)
+                    if dead:
+                        await session.close()
+                if not dead or attempt:
+                    raise
+                continue
+
+            self.calls += 1
+            self.call_seconds += time.perf_counter() - start
+            # A per-call connection would have paid the spawn + handshake again
+            if not spawned:
+                self.saved_seconds += self.startup_seconds / self.spawns
+            return result
+
+    async def close(self):
+        await asyncio.gather(*(s.close() for s in self.sessions))
+
+    def stats(self) -> dict:
+        return {
+            "sessions_alive": sum(s.alive for s in self.sessions),
+            "spawns": self.spawns,
+            "calls": self.calls,
+            "avg_startup_ms": round(1000 * self.startup_seconds / self.spawns, 1) if self.spawns else None,
+            "avg_call_ms": round(1000 * self.call_seconds / self.calls, 1) if self.calls else None,
+            "saved_ms_per_call": round(1000 * self.saved_seconds / self.calls, 1) if self.calls else None,
+        }
+
 
 class MCPInsuranceClient:
     """Client that connects to the MCP insurance server."""
 
-    def __init__(self):
-        self.server_params = StdioServerParameters(
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self.pool = None
+
+    def server_params(self) -> StdioServerParameters:
+        """
+        Read at first use rather than import, so a .env loaded after import
+        still applies. The server runs from its own directory, so a relative
+        fake docs path is resolved against the caller's working directory.
+        """
+        args = [str(SERVER_PATH)]
+        fake_dir = os.getenv("INSURANCE_DOCS_FAKE_DIR")
+        if fake_dir:
+            args += ["--fake-docs", str(Path(fake_dir).resolve())]
+
+        return StdioServerParameters(
             command=sys.executable,
-            args=[str(SERVER_PATH)],
+            args=args,
             cwd=str(SERVER_PATH.parent),
         )
 
     async def search(self, query: str) -> str:
         """Search insurance documents via MCP server."""
-        async with stdio_client(self.server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
+        if self.pool is None:
+            self.pool = MCPSessionPool(self.server_params(), self.pool_size)
 
-                result = await session.call_tool(
-                    "search_insurance_docs",
-                    arguments={"query": query}
-                )
+        result = await self.pool.call_tool(
+            "search_insurance_docs",
+            arguments={"query": query}
+        )
 
-                if result.content:
-                    return result.content[0].text
+        if result.content:
+            return result.content[0].text
 
-                return "No results found."
+        return "No results found."
 
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
 
-def _run_async(coro):
-    """Run async function in sync context."""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                future = pool.submit(asyncio.run, coro)
-                return future.result()
-        else:
-            return loop.run_until_complete(coro)
-    except RuntimeError:
-        return asyncio.run(coro)
+    def stats(self) -> dict:
+        return self.pool.stats() if self.pool else {}
 
 
+# The MCP sessions are bound to the loop that opened them, so every call
+# runs on the shared runtime loop, which closes them at exit
 _client = MCPInsuranceClient()
+get_runtime().on_shutdown(_client.close)
+
+
+def get_mcp_stats() -> dict:
+    """Session pool stats: spawns, call latency and startup latency saved per call."""
+    return _client.stats()
 
 
 @tool
@@ -79,7 +262,7 @@ def search_insurance_docs(query: str) -> str:
         Relevant insurance policy information from Google Docs
     """
     try:
-        result = _run_async(_client.search(query))
+        result = run_sync(_client.search(query))
         return result
     except Exception as e:
         return f"MCP Error: {str(e)}"
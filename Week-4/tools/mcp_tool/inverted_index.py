@@ -0,0 +1,161 @@
+"""
+Positional inverted index for the insurance document mirror
+
+Documents are ranked with BM25. Excerpts are the token windows holding the
+densest run of query-term positions, so one document can contribute several
+passages. Query cost depends on the postings of the query terms, not on the
+size of the corpus.
+"""
+
+import math
+import re
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Query terms at least this long also match longer index terms
+# ("cyber" -> "cybersecurity"), like the old substring search did
+MIN_PREFIX_LENGTH = 4
+
+
+def tokenize(text: str) -> list:
+    """Lowercased tokens with their (start, end) character offsets."""
+    return [(m.group().lower(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+
+def query_terms(query: str) -> list:
+    """Distinct query terms, skipping very short words."""
+    terms = []
+    for term, _, _ in tokenize(query):
+        if len(term) > 2 and term not in terms:
+            terms.append(term)
+    return terms
+
+
+class InvertedIndex:
+    """Term -> {doc_id: [token positions]}, plus what excerpts need per doc."""
+
+    def __init__(self):
+        self.postings = {}
+        self.offsets = {}
+        self.texts = {}
+        self.total_length = 0
+        self._vocab = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, doc_id: str, text: str):
+        self.remove(doc_id)
+
+        tokens = tokenize(text)
+        for position, (term, _, _) in enumerate(tokens):
+            self.postings.setdefault(term, {}).setdefault(doc_id, []).append(position)
+
+        self.offsets[doc_id] = [(start, end) for _, start, end in tokens]
+        self.texts[doc_id] = text
+        self.total_length += len(tokens)
+        self._vocab = None
+
+    def remove(self, doc_id: str):
+        if doc_id not in self.texts:
+            return
+
+        for term, _, _ in tokenize(self.texts[doc_id]):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+
+        self.total_length -= len(self.offsets.pop(doc_id))
+        del self.texts[doc_id]
+        self._vocab = None
+
+    def expand(self, term: str) -> list:
+        """Index terms matching a query term: the term itself, or its prefix range."""
+        if len(term) < MIN_PREFIX_LENGTH:
+            return [term] if term in self.postings else []
+
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        matches = []
+        i = bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            matches.append(self._vocab[i])
+            i += 1
+        return matches
+
+    def search(self, terms: list) -> list:
+        """
+        Rank documents for the query terms with BM25.
+
+        Returns:
+            [(doc_id, score, matched_terms, positions)] best first, where
+            positions are the sorted token positions of every hit.
+        """
+        n_docs = len(self.texts)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs
+
+        scores = {}
+        matched = {}
+        positions = {}
+        for query_term in terms:
+            for term in self.expand(query_term):
+                docs = self.postings[term]
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, hits in docs.items():
+                    tf = len(hits)
+                    length_norm = 1 - B + B * len(self.offsets[doc_id]) / avg_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + K1 * length_norm)
+                    matched.setdefault(doc_id, set()).add(query_term)
+                    positions.setdefault(doc_id, []).extend(hits)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return [
+            (doc_id, scores[doc_id], [t for t in terms if t in matched[doc_id]], sorted(positions[doc_id]))
+            for doc_id in ranked
+        ]
+
+    def passages(self, doc_id: str, positions: list, window: int = 60, max_passages: int = 3) -> list:
+        """
+        Pick up to max_passages non-overlapping windows of `window` tokens
+        holding the most hits, densest first. Returns (start, end) character
+        spans in document order.
+        """
+        offsets = self.offsets[doc_id]
+        remaining = list(positions)
+        spans = []
+
+        while remaining and len(spans) < max_passages:
+            # Two pointers: widest run of hits fitting inside one window
+            best_count, best_lo, lo = 0, 0, 0
+            for hi in range(len(remaining)):
+                while remaining[hi] - remaining[lo] >= window:
+                    lo += 1
+                if hi - lo + 1 > best_count:
+                    best_count, best_lo = hi - lo + 1, lo
+            first = remaining[best_lo]
+            last = remaining[best_lo + best_count - 1]
+
+            # Centre the hits in the window, clamped to the document
+            start = max(0, first - (window - (last - first)) // 2)
+            end = min(len(offsets), start + window) - 1
+            start = max(0, end + 1 - window)
+
+            spans.append((start, end))
+            remaining = [p for p in remaining if p < start or p > end]
+
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return [(offsets[start][0], offsets[end][1]) for start, end in merged]
@@ -2,9 +2,21 @@
 """
 MCP Server for Presidio Insurance Documents
 Provides insurance document search via Model Context Protocol
+
+Document text is mirrored locally (memory + disk). A background task keeps
+the mirror current from Drive's changes feed, so searches never wait on
+Google APIs once the first sync has finished. Searches run against a
+positional inverted index over the mirror (see inverted_index.py).
 """
 
+import argparse
 import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -12,6 +24,9 @@ from mcp.types import Tool, TextContent
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from inverted_index import InvertedIndex, query_terms
 
 # Google API setup
 SCOPES = [
@@ -20,35 +35,101 @@ SCOPES = [
 ]
 CREDENTIALS_PATH = Path(__file__).parent / "credentials" / "service-account.json"
 
+# Local mirror of document text, keyed by Drive file ID
+MIRROR_PATH = Path(__file__).parent / "cache" / "docs_mirror.json"
+FAKE_MIRROR_PATH = Path(__file__).parent / "cache" / "fake_docs_mirror.json"
+# Seconds between incremental syncs from the Drive changes feed
+SYNC_INTERVAL_SECONDS = 30
+# How long a query waits for the first sync when the mirror is empty; kept
+# under the client's CALL_TIMEOUT (60s) so it gets an answer, not a timeout
+INITIAL_SYNC_TIMEOUT = 45
+# Docs read concurrently during a sync
+FETCH_WORKERS = 8
+
+# How doc text is fetched (compare with benchmark_fetch.py):
+# - "export": Drive plain-text export, no document JSON at all
+# - "fields": Docs API with a field mask limited to the text runs
+# - "full": the complete Docs API document JSON
+FETCH_MODE = "export"
+DOC_TEXT_FIELDS = "body(content(paragraph(elements(textRun(content)))))"
+
+# Search results: documents returned, passages per document, tokens per passage
+MAX_RESULTS = 5
+MAX_PASSAGES = 3
+PASSAGE_TOKENS = 60
+
+DOC_MIME_TYPE = "application/vnd.google-apps.document"
+INSURANCE_DOCS_QUERY = f"mimeType='{DOC_MIME_TYPE}' and name contains 'Insurance' and trashed=false"
+CHANGE_FIELDS = "nextPageToken, newStartPageToken, changes(fileId, removed, file(id, name, mimeType, modifiedTime, trashed))"
+
+# Directory of .txt files served by fake_google instead of the real APIs (--fake-docs)
+FAKE_DOCS_DIR = None
+
 # MCP Server
 server = Server("presidio-insurance-mcp")
 
 
+_credentials = None
+_fake_services = None
+_local = threading.local()
+_services_lock = threading.Lock()
+
+
 def get_google_services():
-    """Get Google Docs and Drive services."""
-    creds = service_account.Credentials.from_service_account_file(
-        str(CREDENTIALS_PATH),
-        scopes=SCOPES,
-    )
-    docs_service = build("docs", "v1", credentials=creds)
-    drive_service = build("drive", "v3", credentials=creds)
-    return docs_service, drive_service
+    """
+    Get Google Docs and Drive services. Credentials are loaded once; the
+    clients are built once per thread, as their HTTP transport is not
+    thread-safe.
+    """
+    global _credentials, _fake_services
+    with _services_lock:
+        if FAKE_DOCS_DIR:
+            if _fake_services is None:
+                from fake_google import FakeGoogle
+                google = FakeGoogle(FAKE_DOCS_DIR)
+                _fake_services = (google, google)
+            return _fake_services
+        if _credentials is None:
+            _credentials = service_account.Credentials.from_service_account_file(
+                str(CREDENTIALS_PATH),
+                scopes=SCOPES,
+            )
+
+    if not hasattr(_local, "services"):
+        docs_service = build("docs", "v1", credentials=_credentials)
+        drive_service = build("drive", "v3", credentials=_credentials)
+        _local.services = (docs_service, drive_service)
+    return _local.services
 
 
 def list_insurance_docs():
     """List all insurance documents from Google Drive."""
     _, drive = get_google_services()
     results = drive.files().list(
-        q="mimeType='application/vnd.google-apps.document' and name contains 'Insurance'",
+        q=INSURANCE_DOCS_QUERY,
         fields="files(id, name, modifiedTime)",
     ).execute()
     return results.get("files", [])
 
 
-def read_doc(doc_id: str) -> str:
-    """Read content from a Google Doc."""
-    docs, _ = get_google_services()
-    document = docs.documents().get(documentId=doc_id).execute()
+def doc_request(doc_id: str, mode: str = None):
+    """Unexecuted API request fetching a doc in the given (or configured) FETCH_MODE."""
+    mode = mode or FETCH_MODE
+    docs, drive = get_google_services()
+    if mode == "export":
+        return drive.files().export_media(fileId=doc_id, mimeType="text/plain")
+    if mode == "fields":
+        return docs.documents().get(documentId=doc_id, fields=DOC_TEXT_FIELDS)
+    return docs.documents().get(documentId=doc_id)
+
+
+def parse_export(content: bytes) -> str:
+    """Text of a text/plain export, which is UTF-8 with a BOM and CRLF newlines."""
+    return content.decode("utf-8-sig").replace("\r\n", "\n")
+
+
+def parse_document(document: dict) -> str:
+    """Text of a Docs API document, from its paragraph text runs."""
     content = document.get("body", {}).get("content", [])
 
     text = []
@@ -64,82 +145,233 @@ def read_doc(doc_id: str) -> str:
     return "".join(text)
 
 
-def extract_excerpt(text: str, keywords: list, context_chars: int = 300) -> str:
-    """Extract relevant excerpt containing keywords."""
-    text_lower = text.lower()
+def read_doc(doc_id: str) -> str:
+    """Read content from a Google Doc."""
+    result = doc_request(doc_id).execute()
+    if FETCH_MODE == "export":
+        return parse_export(result)
+    return parse_document(result)
+
 
-    best_pos = len(text)
-    for kw in keywords:
-        pos = text_lower.find(kw)
-        if pos != -1 and pos < best_pos:
-            best_pos = pos
+fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="docs-fetch")
 
-    if best_pos == len(text):
-        return text[:500].strip() + "..."
 
-    start = max(0, best_pos - context_chars // 2)
-    end = min(len(text), best_pos + context_chars)
+def fetch_docs(doc_ids: list) -> dict:
+    """Read several docs concurrently. Returns {doc_id: text}."""
+    return dict(zip(doc_ids, fetch_pool.map(read_doc, doc_ids)))
 
-    if start > 0:
-        space_pos = text.find(" ", start)
-        if space_pos != -1 and space_pos < best_pos:
-            start = space_pos + 1
 
-    if end < len(text):
-        space_pos = text.rfind(" ", best_pos, end)
-        if space_pos != -1:
-            end = space_pos
+def is_insurance_doc(file: dict) -> bool:
+    """Client-side version of INSURANCE_DOCS_QUERY, for changes-feed entries."""
+    return (
+        bool(file)
+        and not file.get("trashed")
+        and file.get("mimeType") == DOC_MIME_TYPE
+        and "insurance" in file.get("name", "").lower()
+    )
 
-    excerpt = text[start:end].strip()
 
+class DocMirror:
+    """
+    In-memory + on-disk copy of the insurance docs' text, keyed by file ID,
+    together with the Drive changes-feed page token it is current as of.
+    """
+
+    def __init__(self, path: Path = MIRROR_PATH):
+        self.path = path
+        self.docs = {}
+        self.index = InvertedIndex()
+        self.page_token = None
+        self.fetches = 0
+        self.lock = threading.Lock()
+        # Set once the mirror is loaded or the first sync attempt has ended
+        self.ready = threading.Event()
+        self.sync_error = None
+        self.load()
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            data = {}
+        self.docs = data.get("docs", {})
+        self.page_token = data.get("page_token")
+        self.index = InvertedIndex()
+        for file_id, doc in self.docs.items():
+            self.index.add(file_id, doc["text"])
+        if self.page_token:
+            self.ready.set()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            data = json.dumps({"page_token": self.page_token, "docs": self.docs})
+        # A temp file of our own: other server processes may be saving the
+        # same mirror, and a shared temp name would let their writes interleave
+        with tempfile.NamedTemporaryFile("w", dir=self.path.parent, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        os.replace(f.name, self.path)
+
+    def update(self, files: list) -> bool:
+        """
+        Store file metadata, re-reading (concurrently) only the docs whose
+        modifiedTime moved. Returns True if the mirror changed.
+        """
+        stale = [
+            f["id"] for f in files
+            if f["id"] not in self.docs or self.docs[f["id"]]["modifiedTime"] != f.get("modifiedTime")
+        ]
+        texts = fetch_docs(stale)
+        self.fetches += len(stale)
+
+        changed = False
+        with self.lock:
+            for f in files:
+                cached = self.docs.get(f["id"])
+                if f["id"] not in texts and cached["name"] == f["name"]:
+                    continue
+                self.docs[f["id"]] = {
+                    "name": f["name"],
+                    "modifiedTime": f.get("modifiedTime"),
+                    "text": texts[f["id"]] if f["id"] in texts else cached["text"],
+                }
+                if f["id"] in texts:
+                    self.index.add(f["id"], texts[f["id"]])
+                changed = True
+        return changed
+
+    def remove(self, file_id: str) -> bool:
+        with self.lock:
+            self.index.remove(file_id)
+            return self.docs.pop(file_id, None) is not None
+
+    def full_sync(self):
+        """List every insurance doc and take a fresh changes-feed token."""
+        _, drive = get_google_services()
+        # Token first, so edits made during the listing are replayed next sync
+        token = drive.changes().getStartPageToken().execute()["startPageToken"]
+        files = list_insurance_docs()
+
+        listed = {f["id"] for f in files}
+        for file_id in list(self.docs):
+            if file_id not in listed:
+                self.remove(file_id)
+        self.update(files)
+
+        self.page_token = token
+        self.save()
+
+    def sync_changes(self):
+        """Apply Drive changes since the stored page token."""
+        _, drive = get_google_services()
+        token = self.page_token
+        latest = {}
+
+        while True:
+            res = drive.changes().list(
+                pageToken=token,
+                spaces="drive",
+                includeRemoved=True,
+                fields=CHANGE_FIELDS,
+            ).execute()
+            # Only the newest change per file matters
+            for change in res.get("changes", []):
+                latest[change["fileId"]] = change
+            if "newStartPageToken" in res:
+                new_token = res["newStartPageToken"]
+                break
+            token = res["nextPageToken"]
+
+        changed = False
+        updated = []
+        for file_id, change in latest.items():
+            file = change.get("file")
+            if change.get("removed") or not is_insurance_doc(file):
+                changed |= self.remove(file_id)
+            else:
+                updated.append(file)
+        changed |= self.update(updated)
+
+        if changed or new_token != self.page_token:
+            self.page_token = new_token
+            self.save()
+
+    def refresh(self):
+        """
+        One sync step: a full sync on first run, incremental afterwards.
+        A failure is kept in sync_error until a later step succeeds.
+        """
+        try:
+            if self.page_token is None:
+                self.full_sync()
+            else:
+                try:
+                    self.sync_changes()
+                except HttpError as e:
+                    # An expired or invalid page token: start over from a listing
+                    if e.resp.status not in (400, 404, 410):
+                        raise
+                    self.page_token = None
+                    self.full_sync()
+        except Exception as e:
+            self.sync_error = e
+            raise
+        else:
+            self.sync_error = None
+        finally:
+            self.ready.set()
+
+    def search(self, terms: list) -> list:
+        """
+        BM25-ranked documents for the query terms, each with its densest
+        passages. Reads the mirror only; no Google API calls.
+        """
+        self.ready.wait(INITIAL_SYNC_TIMEOUT)
+        results = []
+        with self.lock:
+            for file_id, score, matched, positions in self.index.search(terms)[:MAX_RESULTS]:
+                text = self.docs[file_id]["text"]
+                spans = self.index.passages(file_id, positions, PASSAGE_TOKENS, MAX_PASSAGES)
+                results.append({
+                    "title": self.docs[file_id]["name"],
+                    "passages": [format_passage(text, start, end) for start, end in spans],
+                    "relevance": score,
+                    "keywords": matched,
+                })
+        return results
+
+
+mirror = DocMirror()
+
+
+def format_passage(text: str, start: int, end: int) -> str:
+    """Passage text, with ellipses where it cuts into the document."""
+    passage = " ".join(text[start:end].split())
     if start > 0:
-        excerpt = "..." + excerpt
-    if end < len(text):
-        excerpt = excerpt + "..."
-
-    return excerpt
+        passage = "..." + passage
+    if end < len(text.rstrip()):
+        passage = passage + "..."
+    return passage
 
 
 def search_docs(query: str) -> str:
     """Search insurance documents for a query."""
-    docs = list_insurance_docs()
-
-    if not docs:
-        return "No insurance documents found in Google Drive."
-
-    keywords = [kw.strip().lower() for kw in query.split() if len(kw.strip()) > 2]
-    results = []
-
-    for doc in docs:
-        text = read_doc(doc["id"])
-        text_lower = text.lower()
-
-        match_count = 0
-        matched_keywords = []
-        for kw in keywords:
-            if kw in text_lower:
-                match_count += text_lower.count(kw)
-                matched_keywords.append(kw)
-
-        if matched_keywords:
-            excerpt = extract_excerpt(text, matched_keywords)
-            results.append({
-                "title": doc["name"],
-                "excerpt": excerpt,
-                "relevance": match_count,
-                "keywords": matched_keywords,
-            })
-
-    results.sort(key=lambda x: x["relevance"], reverse=True)
+    results = mirror.search(query_terms(query))
 
     if not results:
+        if not mirror.docs:
+            if mirror.sync_error is not None:
+                return f"Insurance documents are unavailable, Google Drive sync failed: {mirror.sync_error}"
+            if not mirror.ready.is_set():
+                return "Insurance documents are still syncing from Google Drive, try again shortly."
+            return "No insurance documents found in Google Drive."
         return f"No insurance documents found matching: {query}"
 
     formatted = f"**Insurance Search Results for: '{query}'**\n\n"
     for r in results:
         formatted += f"### {r['title']}\n"
         formatted += f"**Matched:** {', '.join(r['keywords'])}\n"
-        formatted += f"{r['excerpt']}\n\n"
+        formatted += "\n".join(r["passages"]) + "\n\n"
 
     return formatted
 
@@ -170,17 +402,40 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls."""
     if name == "search_insurance_docs":
         query = arguments.get("query", "")
-        result = search_docs(query)
+        # Off the event loop, so concurrent requests are served in parallel
+        result = await asyncio.to_thread(search_docs, query)
         return [TextContent(type="text", text=result)]
 
     return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
 
+async def sync_mirror():
+    """Background task keeping the mirror current from the Drive changes feed."""
+    while True:
+        try:
+            await asyncio.to_thread(mirror.refresh)
+        except Exception as e:
+            # stdout carries the MCP protocol, so report on stderr
+            print(f"Drive sync failed: {e}", file=sys.stderr)
+        await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+
+
 async def main():
     """Run the MCP server."""
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    sync_task = asyncio.create_task(sync_mirror())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        sync_task.cancel()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presidio insurance MCP server")
+    parser.add_argument("--fake-docs",
+                        help="Serve .txt files from this directory instead of Google Docs")
+    args = parser.parse_args()
+    if args.fake_docs:
+        FAKE_DOCS_DIR = args.fake_docs
+        mirror = DocMirror(FAKE_MIRROR_PATH)
     asyncio.run(main())
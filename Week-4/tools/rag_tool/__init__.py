@@ -1,5 +1,5 @@
 """RAG Tool for HR Policy Document Search"""
 
-from .rag_tool import search_hr_policies, get_rag_tools, vectorize_documents
+from .rag_tool import search_hr_policies, get_rag_tools, get_rag_stats, vectorize_documents
 
-__all__ = ["search_hr_policies", "get_rag_tools", "vectorize_documents"]
+__all__ = ["search_hr_policies", "get_rag_tools", "get_rag_stats", "vectorize_documents"]
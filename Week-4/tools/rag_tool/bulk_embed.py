@@ -0,0 +1,195 @@
+"""
+Bulk document embedding for HR index builds
+Concurrent, throttling-aware and resumable from a JSONL checkpoint
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from botocore.exceptions import ConnectionError as BotoConnectionError, HTTPClientError
+
+# Bedrock error codes that mean "slow down and retry"
+THROTTLE_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+)
+
+# Network failures worth retrying: connect and read timeouts, dropped
+# connections. botocore's HTTPClientError covers read timeouts.
+TRANSIENT_ERRORS = (BotoConnectionError, HTTPClientError, ConnectionError, TimeoutError)
+
+
+def error_chain(error: Exception):
+    """The error and the errors it was raised from, e.g. by BedrockEmbeddings."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_throttle(error: Exception) -> bool:
+    """True for Bedrock throttling, including errors re-raised by BedrockEmbeddings."""
+    for e in error_chain(error):
+        response = getattr(e, "response", None)
+        code = response.get("Error", {}).get("Code", "") if isinstance(response, dict) else ""
+        if code in THROTTLE_CODES or any(c in str(e) for c in THROTTLE_CODES):
+            return True
+    return False
+
+
+def is_transient(error: Exception) -> bool:
+    """True for connection errors and timeouts, however they were wrapped."""
+    return any(isinstance(e, TRANSIENT_ERRORS) for e in error_chain(error))
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that halves on throttling and grows back by one after
+    a run of successful batches (AIMD).
+    """
+
+    def __init__(self, max_limit: int, grow_after: int = 4):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.grow_after = grow_after
+        self.in_flight = 0
+        self.successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.grow_after and self.limit < self.max_limit:
+                    self.limit += 1
+                    self.successes = 0
+            self._cond.notify_all()
+
+
+class BulkEmbedder:
+    """Embeds document chunks in concurrent batches, checkpointing each batch."""
+
+    def __init__(
+        self,
+        embeddings,
+        model_id: str,
+        checkpoint_path: Path,
+        batch_size: int = 16,
+        concurrency: int = 4,
+        max_retries: int = 8,
+        backoff: float = 1.0,
+    ):
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.checkpoint_path = Path(checkpoint_path)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = AdaptiveLimiter(concurrency)
+        self.executor_workers = concurrency
+        self._write_lock = threading.Lock()
+
+    def load_checkpoint(self) -> dict:
+        """Vectors already embedded by an earlier, interrupted build."""
+        vectors = {}
+        if not self.checkpoint_path.exists():
+            return vectors
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted write
+                    continue
+                if entry.get("model") == self.model_id:
+                    vectors[entry["id"]] = entry["vector"]
+        return vectors
+
+    def _save_batch(self, ids: list, vectors: list):
+        with self._write_lock:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                for chunk_id, vector in zip(ids, vectors):
+                    f.write(json.dumps({"model": self.model_id, "id": chunk_id, "vector": vector}) + "\n")
+                f.flush()
+
+    def clear_checkpoint(self):
+        self.checkpoint_path.unlink(missing_ok=True)
+
+    def _embed_batch(self, texts: list) -> list:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            throttled = False
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                throttled = is_throttle(e)
+                if not (throttled or is_transient(e)) or attempt == self.max_retries:
+                    raise
+                error = e
+            finally:
+                self.limiter.release(throttled)
+
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            if throttled:
+                print(f"[RAG] Throttled by Bedrock, limit now {self.limiter.limit}, retrying in {delay:.1f}s")
+            else:
+                print(f"[RAG] Bedrock request failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def embed(self, texts: list, ids: list) -> list:
+        """Embed texts (resuming from the checkpoint); returns vectors in input order."""
+        done = self.load_checkpoint()
+        pending = [i for i, chunk_id in enumerate(ids) if chunk_id not in done]
+        if len(pending) < len(ids):
+            print(f"[RAG] Resuming: {len(ids) - len(pending)} of {len(ids)} chunks already embedded")
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        progress = {"chunks": 0}
+        progress_lock = threading.Lock()
+        start = time.perf_counter()
+
+        def run(batch):
+            vectors = self._embed_batch([texts[i] for i in batch])
+            batch_ids = [ids[i] for i in batch]
+            self._save_batch(batch_ids, vectors)
+            with progress_lock:
+                done.update(zip(batch_ids, vectors))
+                progress["chunks"] += len(batch)
+                rate = progress["chunks"] / (time.perf_counter() - start)
+                print(f"[RAG] Embedded {progress['chunks']}/{len(pending)} chunks ({rate:.1f} chunks/s)")
+
+        with ThreadPoolExecutor(max_workers=self.executor_workers) as pool:
+            futures = [pool.submit(run, batch) for batch in batches]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Finished batches are checkpointed; don't start the rest
+                for future in futures:
+                    future.cancel()
+                raise
+
+        if pending:
+            elapsed = time.perf_counter() - start
+            print(f"[RAG] Embedded {len(pending)} chunks in {elapsed:.1f}s "
+                  f"({len(pending) / elapsed:.1f} chunks/s)")
+        return [done[chunk_id] for chunk_id in ids]
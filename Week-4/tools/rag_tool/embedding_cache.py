@@ -0,0 +1,106 @@
+"""
+Query-embedding cache for the HR RAG tool
+Wraps an Embeddings model so repeated questions skip the Bedrock round trip
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text: str) -> str:
+    """Cache key text: case and whitespace differences don't matter."""
+    return " ".join(text.lower().split())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    LRU cache of query embeddings keyed by (model ID, normalized query).
+
+    Document embeddings pass straight through. With `path` set, misses are
+    appended to a JSONL file and reloaded on start, so popular questions stay
+    warm across restarts.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_id: str, max_size: int = 1024, path: Path = None):
+        self.embeddings = embeddings
+        self.model_id = model_id
+        self.max_size = max_size
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._lines = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._lines += 1
+                if entry.get("model") == self.model_id:
+                    self._store((self.model_id, entry["query"]), entry["vector"])
+
+    def _store(self, key, vector):
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _persist(self, query: str, vector: list):
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Rewrite from memory once the log holds mostly evicted entries
+        if self._lines >= 2 * self.max_size:
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for (model, cached_query), cached_vector in self._cache.items():
+                    f.write(json.dumps({"model": model, "query": cached_query, "vector": cached_vector}) + "\n")
+            tmp.replace(self.path)
+            self._lines = len(self._cache)
+            return
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"model": self.model_id, "query": query, "vector": vector}) + "\n")
+        self._lines += 1
+
+    def embed_query(self, text: str) -> list:
+        query = normalize_query(text)
+        key = (self.model_id, query)
+
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            self.misses += 1
+
+        vector = self.embeddings.embed_query(text)
+
+        with self._lock:
+            self._store(key, vector)
+            self._persist(query, vector)
+        return vector
+
+    def embed_documents(self, texts: list) -> list:
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "query_cache_size": len(self._cache),
+            "query_cache_hits": self.hits,
+            "query_cache_misses": self.misses,
+            "query_cache_hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
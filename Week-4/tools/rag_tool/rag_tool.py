@@ -1,22 +1,65 @@
 """
 RAG Tool for HR Policy Document Search and Retrieval
 Uses FAISS for vector storage and AWS Bedrock embeddings
+
+A manifest of per-file content hashes lets vectorize_documents re-embed only
+the files that changed since the last build. Chunks are embedded concurrently
+(see bulk_embed.py) and an interrupted build resumes from its checkpoint.
 """
 
+import hashlib
+import json
+import os
+import shutil
 from pathlib import Path
 from langchain_core.tools import tool
 from langchain_aws import BedrockEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from .bulk_embed import BulkEmbedder
+from .embedding_cache import CachedQueryEmbeddings
+
 # Paths - Week-4/data/ is two levels up from rag_tool/rag_tool.py
 WEEK4_DIR = Path(__file__).parent.parent.parent
 DOCS_PATH = WEEK4_DIR / "data" / "hr_policies"
 VECTOR_STORE_PATH = WEEK4_DIR / "data" / "vector_store"
+MANIFEST_PATH = VECTOR_STORE_PATH / "manifest.json"
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# Index builds: chunks per Bedrock batch, batches in flight (halved while
+# throttled), and the checkpoint an interrupted build resumes from
+EMBED_BATCH_SIZE = 16
+EMBED_CONCURRENCY = 4
+EMBED_MAX_RETRIES = 8
+EMBED_CHECKPOINT_PATH = WEEK4_DIR / "data" / "embedding_checkpoint.jsonl"
+
+# Query embeddings cached in memory (LRU) and persisted across restarts;
+# set QUERY_CACHE_PATH to None to keep the cache in memory only
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_PATH = WEEK4_DIR / "data" / "query_embeddings.jsonl"
 
 # Global vector store
 _vector_store = None
+_embeddings = None
+
+
+def get_embeddings():
+    """Get the Bedrock embeddings, with cached query embeddings."""
+    global _embeddings
+
+    if _embeddings is None:
+        _embeddings = CachedQueryEmbeddings(
+            BedrockEmbeddings(model_id=EMBEDDING_MODEL_ID),
+            model_id=EMBEDDING_MODEL_ID,
+            max_size=QUERY_CACHE_SIZE,
+            path=QUERY_CACHE_PATH,
+        )
+    return _embeddings
 
 
 def get_vector_store():
@@ -26,7 +69,7 @@ def get_vector_store():
     if _vector_store is not None:
         return _vector_store
 
-    embeddings = BedrockEmbeddings(model_id="amazon.titan-embed-text-v2:0")
+    embeddings = get_embeddings()
 
     # Check if vector store exists
     if VECTOR_STORE_PATH.exists():
@@ -43,57 +86,173 @@ def get_vector_store():
     return _vector_store
 
 
-def create_vector_store(embeddings):
-    """Create vector store from HR policy documents."""
-    # Load documents
-    loader = DirectoryLoader(
-        str(DOCS_PATH),
-        glob="**/*.txt",
-        loader_cls=TextLoader,
-        loader_kwargs={"encoding": "utf-8"}
-    )
-    documents = loader.load()
+def index_settings() -> dict:
+    """Settings an index was built with; a change forces a full rebuild."""
+    return {"model": EMBEDDING_MODEL_ID, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
 
-    print(f"[RAG] Loaded {len(documents)} documents")
 
-    # Split into chunks
+def scan_documents() -> dict:
+    """Map each HR document (relative path) to the SHA-256 of its content."""
+    return {
+        path.relative_to(DOCS_PATH).as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(DOCS_PATH.glob("**/*.txt"))
+    }
+
+
+def split_document(rel_path: str, digest: str):
+    """Chunk one document. Returns (chunks, chunk IDs)."""
+    documents = TextLoader(str(DOCS_PATH / rel_path), encoding="utf-8").load()
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
     )
     splits = text_splitter.split_documents(documents)
+    ids = [f"{rel_path}:{digest[:12]}:{i}" for i in range(len(splits))]
+    return splits, ids
+
+
+def get_bulk_embedder(embeddings) -> BulkEmbedder:
+    return BulkEmbedder(
+        embeddings,
+        model_id=EMBEDDING_MODEL_ID,
+        checkpoint_path=EMBED_CHECKPOINT_PATH,
+        batch_size=EMBED_BATCH_SIZE,
+        concurrency=EMBED_CONCURRENCY,
+        max_retries=EMBED_MAX_RETRIES,
+    )
 
-    print(f"[RAG] Created {len(splits)} chunks")
 
-    # Create vector store
-    vector_store = FAISS.from_documents(splits, embeddings)
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
 
-    # Save for future use
+
+def save_vector_store(vector_store, files: dict):
+    """Save the index together with the manifest of what it contains."""
     VECTOR_STORE_PATH.mkdir(parents=True, exist_ok=True)
     vector_store.save_local(str(VECTOR_STORE_PATH))
 
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({**index_settings(), "files": files}, indent=2))
+    os.replace(tmp, MANIFEST_PATH)
+
     print(f"[RAG] Vector store saved to {VECTOR_STORE_PATH}")
 
+
+def create_vector_store(embeddings):
+    """Create vector store from HR policy documents."""
+    documents = scan_documents()
+    print(f"[RAG] Loaded {len(documents)} documents")
+
+    # Split into chunks, with IDs recorded per file
+    splits, ids, files = [], [], {}
+    for rel_path, digest in documents.items():
+        chunks, chunk_ids = split_document(rel_path, digest)
+        splits.extend(chunks)
+        ids.extend(chunk_ids)
+        files[rel_path] = {"sha256": digest, "chunk_ids": chunk_ids}
+
+    print(f"[RAG] Created {len(splits)} chunks")
+
+    # Embed in concurrent batches, then build the store from the vectors
+    bulk_embedder = get_bulk_embedder(embeddings)
+    texts = [doc.page_content for doc in splits]
+    vectors = bulk_embedder.embed(texts, ids)
+    vector_store = FAISS.from_embeddings(
+        list(zip(texts, vectors)),
+        embeddings,
+        metadatas=[doc.metadata for doc in splits],
+        ids=ids,
+    )
+
+    # Save for future use
+    save_vector_store(vector_store, files)
+    bulk_embedder.clear_checkpoint()
+
+    return vector_store
+
+
+def update_vector_store(embeddings, manifest: dict):
+    """Re-embed only the documents added, edited or removed since the manifest."""
+    vector_store = FAISS.load_local(
+        str(VECTOR_STORE_PATH),
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+
+    documents = scan_documents()
+    files = dict(manifest["files"])
+    changed = [p for p, digest in documents.items() if files.get(p, {}).get("sha256") != digest]
+    removed = [p for p in files if p not in documents]
+
+    if not changed and not removed:
+        print(f"[RAG] All {len(documents)} documents up to date")
+        return vector_store
+
+    old_ids = [i for p in changed + removed if p in files for i in files[p]["chunk_ids"]]
+    for p in removed:
+        del files[p]
+
+    splits, ids = [], []
+    for rel_path in changed:
+        chunks, chunk_ids = split_document(rel_path, documents[rel_path])
+        splits.extend(chunks)
+        ids.extend(chunk_ids)
+        files[rel_path] = {"sha256": documents[rel_path], "chunk_ids": chunk_ids}
+
+    # Drop the old chunks of every changed or removed file. The index is
+    # saved before the manifest, so after an interrupted save they can
+    # disagree: only delete IDs the index holds, including new chunk IDs
+    # it already has, which are about to be added again.
+    indexed = set(vector_store.index_to_docstore_id.values())
+    stale_ids = [i for i in dict.fromkeys(old_ids + ids) if i in indexed]
+    if stale_ids:
+        vector_store.delete(stale_ids)
+
+    bulk_embedder = get_bulk_embedder(embeddings)
+    if splits:
+        texts = [doc.page_content for doc in splits]
+        vectors = bulk_embedder.embed(texts, ids)
+        vector_store.add_embeddings(
+            list(zip(texts, vectors)),
+            metadatas=[doc.metadata for doc in splits],
+            ids=ids,
+        )
+
+    print(f"[RAG] {len(changed)} changed and {len(removed)} removed documents: "
+          f"embedded {len(splits)} chunks, deleted {len(stale_ids)}")
+
+    save_vector_store(vector_store, files)
+    bulk_embedder.clear_checkpoint()
     return vector_store
 
 
-def vectorize_documents():
-    """Manually vectorize documents (run before using the agent)."""
+def vectorize_documents(full: bool = False):
+    """
+    Vectorize documents (run before using the agent). Only changed files
+    are re-embedded unless `full` is set or the index settings changed.
+    """
     global _vector_store
 
     print("=" * 50)
     print("Vectorizing HR Policy Documents")
     print("=" * 50)
 
-    # Clear existing
-    if VECTOR_STORE_PATH.exists():
-        import shutil
-        shutil.rmtree(VECTOR_STORE_PATH)
-        print("[RAG] Cleared existing vector store")
-
     _vector_store = None
-    embeddings = BedrockEmbeddings(model_id="amazon.titan-embed-text-v2:0")
-    _vector_store = create_vector_store(embeddings)
+    manifest = load_manifest()
+
+    if not full and manifest.get("files") is not None and all(
+        manifest.get(k) == v for k, v in index_settings().items()
+    ):
+        _vector_store = update_vector_store(get_embeddings(), manifest)
+    else:
+        # Clear existing
+        if VECTOR_STORE_PATH.exists():
+            shutil.rmtree(VECTOR_STORE_PATH)
+            print("[RAG] Cleared existing vector store")
+        _vector_store = create_vector_store(get_embeddings())
 
     print("\nVectorization complete!")
     return _vector_store
@@ -140,6 +299,11 @@ def search_hr_policies(query: str) -> str:
         return f"Error searching HR policies: {str(e)}"
 
 
+def get_rag_stats() -> dict:
+    """Query-embedding cache stats, including the hit rate."""
+    return _embeddings.stats() if _embeddings else {}
+
+
 def get_rag_tools():
     """Return RAG tools for use with LangChain agent."""
     return [search_hr_policies]
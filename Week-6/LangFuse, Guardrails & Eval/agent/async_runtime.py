@@ -0,0 +1,118 @@
+"""
+Long-lived background event loop for running async code from sync callers
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+
+SHUTDOWN_TIMEOUT = 10
+
+
+class AsyncRuntime:
+    """Owns one event loop running in a daemon thread.
+
+    Coroutines from synchronous code (CLI, evaluation runs, callers that are
+    already inside an event loop) are submitted to this loop, so async
+    clients created on it stay usable across calls.
+    """
+
+    def __init__(self, name: str = "async-runtime"):
+        """Initialize the runtime; the loop thread starts on first use.
+
+        Args:
+            name: Name of the loop thread
+        """
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks = []
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+            return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop without waiting for it.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Future resolving to the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """Run a coroutine on the loop and block until it returns.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Optional seconds to wait before cancelling it
+
+        Returns:
+            The coroutine's result
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("AsyncRuntime.run() called from its own loop; await the coroutine instead")
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def on_shutdown(self, hook):
+        """Register an async callable awaited on the loop before it stops.
+
+        Args:
+            hook: Zero-argument async function, e.g. a client's close()
+        """
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self):
+        """Run the shutdown hooks (newest first) and stop the loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                asyncio.run_coroutine_threadsafe(hook(), loop).result(SHUTDOWN_TIMEOUT)
+            except Exception:
+                pass
+
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(SHUTDOWN_TIMEOUT)
+
+
+_runtime = AsyncRuntime()
+
+
+def get_runtime() -> AsyncRuntime:
+    """Get the process-wide runtime."""
+    return _runtime
+
+
+def run_sync(coro, timeout: float = None):
+    """Run a coroutine on the shared runtime from synchronous code.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Optional seconds to wait before cancelling it
+
+    Returns:
+        The coroutine's result
+    """
+    return _runtime.run(coro, timeout)
@@ -4,7 +4,6 @@ NeMo Guardrails integration for the Support Agent
 This module provides GuardedSupportAgent - Full NeMo Guardrails integration with AWS Bedrock
 """
 
-import asyncio
 import time
 from pathlib import Path
 from datetime import datetime
@@ -17,6 +16,7 @@ from langchain_core.messages import HumanMessage
 from config import DEFAULT_MODEL
 from agent.tools import web_search, calculator, get_current_time, company_policy
 from agent.tracing import LangFuseTracer
+from agent.async_runtime import run_sync
 
 
 # Path to guardrails configuration
@@ -281,18 +281,9 @@ class GuardedSupportAgent:
         Returns:
             Dictionary with response and guardrail metadata
         """
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If there's already a running loop, use nest_asyncio
-                import nest_asyncio
-                nest_asyncio.apply()
-                return loop.run_until_complete(self.query_async(question))
-            else:
-                return asyncio.run(self.query_async(question))
-        except RuntimeError:
-            # No event loop exists, create one
-            return asyncio.run(self.query_async(question))
+        # Runs on the shared background loop: the rails' async clients are
+        # reused across queries, with or without a loop in the calling thread
+        return run_sync(self.query_async(question))
 
     def get_metrics(self) -> dict:
         """Get guardrail metrics.